@@ -0,0 +1,181 @@
+"""
+Adaptive Admission Control for Real Estate Chatbot API
+Keeps slow LLM traffic from starving data endpoints that share the same
+worker threads.
+
+Every chatbot route maps to a priority class (ADMISSION_ROUTES). Each class
+has its own concurrency limit, tuned AIMD-style from observed latency: +1
+per limit's worth of fast responses, x0.9 (at most once per latency window)
+when responses exceed the class's target latency or fail, or while a
+higher-priority class is queueing - a slow class's own latency target says
+nothing about the threads it is taking from faster ones. Requests over the
+limit wait in a short bounded queue; when that is full, times out, or a
+higher-priority class is already queueing, they are shed with 503 +
+Retry-After instead of tying up a worker.
+
+Limits are per process, so they only bite with threaded workers
+(gunicorn --threads N, or runserver).
+"""
+
+from django.conf import settings
+
+import math
+import threading
+import time
+
+
+class AdaptiveLimit:
+    """Concurrency limit + bounded wait queue for one priority class"""
+
+    def __init__(self, name, priority=0, limit=8, min_limit=1, max_limit=64,
+                 queue=0, queue_timeout=0.0, target_latency=1.0, backoff=0.9,
+                 clock=time.monotonic):
+        self.name = name
+        self.priority = priority
+        self.limit = float(min(max(limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.clock = clock
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency = target_latency  # EWMA, seconds
+        self._last_decrease = float('-inf')
+        self._cond = threading.Condition()
+        self.metrics = {'admitted': 0, 'rejected': 0, 'shed': 0, 'timedOut': 0, 'decreases': 0}
+
+    def _has_capacity(self):
+        return self.in_flight < max(int(self.limit), 1)
+
+    def acquire(self, shed=False):
+        """
+        Take a slot, waiting up to queue_timeout for one.
+
+        Args:
+            shed: reject outright instead of queueing (higher-priority
+                  traffic is backed up)
+
+        Returns:
+            bool: True if admitted - caller must release()
+        """
+        with self._cond:
+            if self.waiting == 0 and self._has_capacity():
+                self.in_flight += 1
+                self.metrics['admitted'] += 1
+                return True
+
+            if shed:
+                self.metrics['rejected'] += 1
+                self.metrics['shed'] += 1
+                return False
+            if self.waiting >= self.max_queue or self.queue_timeout <= 0:
+                self.metrics['rejected'] += 1
+                return False
+
+            self.waiting += 1
+            deadline = self.clock() + self.queue_timeout
+            try:
+                while not self._has_capacity():
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.metrics['rejected'] += 1
+                        self.metrics['timedOut'] += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            self.metrics['admitted'] += 1
+            return True
+
+    def release(self, latency, ok=True, congested=False):
+        """
+        Free a slot and adapt the limit to the request's latency.
+
+        Args:
+            congested: a higher-priority class is queueing, so back off
+                       whatever this class's own latency looks like
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self.latency += 0.2 * (latency - self.latency)
+
+            now = self.clock()
+            if not ok or congested or latency > self.target_latency:
+                # One cut per latency window, not one per slow request in flight
+                if now - self._last_decrease >= self.latency:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+                    self.metrics['decreases'] += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self._cond.notify()
+
+    def retry_after(self):
+        """Seconds until a slot is likely free, from the latency EWMA"""
+        queued = self.waiting + 1
+        return min(60, max(1, math.ceil(self.latency * queued / max(int(self.limit), 1))))
+
+    def stats(self):
+        return {
+            'priority': self.priority,
+            'limit': round(self.limit, 2),
+            'inFlight': self.in_flight,
+            'queued': self.waiting,
+            'maxQueue': self.max_queue,
+            'latencyMs': round(self.latency * 1000, 1),
+            'targetLatencyMs': round(self.target_latency * 1000, 1),
+            **self.metrics,
+        }
+
+
+class AdmissionController:
+    """Per-class adaptive limits; lower priority number = more important"""
+
+    def __init__(self, classes, routes, default_class, clock=time.monotonic):
+        self.classes = {
+            name: AdaptiveLimit(name, clock=clock, **config) for name, config in classes.items()
+        }
+        self.routes = dict(routes)
+        self.default_class = default_class
+
+    def classify(self, url_name):
+        """Priority class for a chatbot route name, or None if exempt"""
+        name = self.routes.get(url_name, self.default_class)
+        return self.classes.get(name) if name else None
+
+    def congested(self, limit):
+        """True when a more important class than limit is queueing"""
+        return any(
+            other.waiting > 0 for other in self.classes.values() if other.priority < limit.priority
+        )
+
+    def acquire(self, limit):
+        """Admit into a class, shedding it if more important classes are queueing"""
+        return limit.acquire(shed=self.congested(limit))
+
+    def release(self, limit, latency, ok=True):
+        """Release a slot, backing the class off if more important classes are queueing"""
+        limit.release(latency, ok=ok, congested=self.congested(limit))
+
+    def stats(self):
+        return {
+            'enabled': settings.ADMISSION_CONTROL,
+            'classes': {name: limit.stats() for name, limit in self.classes.items()},
+        }
+
+
+def build_controller(clock=time.monotonic):
+    """Controller configured from settings"""
+    return AdmissionController(
+        settings.ADMISSION_CLASSES, settings.ADMISSION_ROUTES, settings.ADMISSION_DEFAULT_CLASS, clock=clock,
+    )
+
+
+controller = build_controller()
@@ -0,0 +1,236 @@
+"""
+Market Analytics for Real Estate Chatbot
+Vectorised growth, trend and volatility metrics for every area, computed
+once per dataset generation from area x year matrices
+"""
+
+import numpy as np
+import threading
+import warnings
+
+# Source columns pivoted into area x year matrices
+SERIES_COLUMNS = {
+    'flat': 'flat_avg_rate',
+    'office': 'office_avg_rate',
+    'shop': 'shop_avg_rate',
+    'sales': 'total_sales',
+    'units': 'total_sold',
+}
+
+METRICS = {
+    'yoy_growth': 'Latest year-over-year change in flat rate (%)',
+    'flat_cagr': 'Compound annual growth of flat rate (%)',
+    'office_cagr': 'Compound annual growth of office rate (%)',
+    'shop_cagr': 'Compound annual growth of shop rate (%)',
+    'sales_trend': 'Linear trend of sales value (% of mean per year)',
+    'units_trend': 'Linear trend of units sold (% of mean per year)',
+    'volatility': 'Std. deviation of yearly flat rate changes (%)',
+}
+
+
+def pivot_series(df, column, areas, years):
+    """Pivot one column into an area x year float matrix (NaN where missing)"""
+    matrix = np.full((len(areas), len(years)), np.nan)
+    if column not in df.columns:
+        return matrix
+    rows = np.searchsorted(areas, df['area'].to_numpy())
+    cols = np.searchsorted(years, df['year'].to_numpy())
+    matrix[rows, cols] = df[column].to_numpy(dtype=float)
+    return matrix
+
+
+def _first_last(matrix):
+    """First and last valid value per row plus their column indices"""
+    valid = ~np.isnan(matrix)
+    has_any = valid.any(axis=1)
+    first_idx = valid.argmax(axis=1)
+    last_idx = matrix.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    rows = np.arange(matrix.shape[0])
+    first = np.where(has_any, matrix[rows, first_idx], np.nan)
+    last = np.where(has_any, matrix[rows, last_idx], np.nan)
+    return first, last, first_idx, last_idx
+
+
+def _cagr(matrix, years):
+    """Compound annual growth between each row's first and last valid year"""
+    if matrix.shape[1] == 0:
+        return np.full(matrix.shape[0], np.nan)
+    first, last, first_idx, last_idx = _first_last(matrix)
+    span = (years[last_idx] - years[first_idx]).astype(float)
+    span[span <= 0] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = (np.power(last / first, 1.0 / span) - 1) * 100
+    # pow(1, nan) is 1, so single-year rows need masking explicitly
+    return np.where(np.isnan(span), np.nan, cagr)
+
+
+def _trend(matrix, years):
+    """Least-squares slope per row as a percentage of the row mean"""
+    valid = ~np.isnan(matrix)
+    x = np.where(valid, years.astype(float), np.nan)
+    count = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        x_mean = np.nanmean(x, axis=1, keepdims=True)
+        y_mean = np.nanmean(matrix, axis=1, keepdims=True)
+        cov = np.nansum((x - x_mean) * (matrix - y_mean), axis=1)
+        var = np.nansum((x - x_mean) ** 2, axis=1)
+        slope = cov / var
+        trend = slope / y_mean[:, 0] * 100
+    return np.where(count >= 2, trend, np.nan)
+
+
+def _yearly_changes(matrix):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (matrix[:, 1:] - matrix[:, :-1]) / matrix[:, :-1] * 100
+
+
+def _frame_series(df, areas, years):
+    """Area x year matrices of every series for the given (sorted) areas"""
+    frame = df.assign(year=df['year'].astype(int)).drop_duplicates(['area', 'year'], keep='last')
+    series = {}
+    for name, column in SERIES_COLUMNS.items():
+        matrix = pivot_series(frame, column, areas, years)
+        if name in ('flat', 'office', 'shop'):
+            # A zero rate means "not reported", not a free property
+            matrix[matrix <= 0] = np.nan
+        series[name] = matrix
+    return series
+
+
+def compute_metrics(series, years):
+    """All metrics for every row of the given matrices"""
+    flat = series['flat']
+    n = flat.shape[0]
+    yoy = np.full(n, np.nan)
+    volatility = np.full(n, np.nan)
+    if flat.shape[1] > 1:
+        changes = _yearly_changes(flat)
+        valid = ~np.isnan(changes)
+        latest_idx = changes.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+        yoy = np.where(valid.any(axis=1), changes[np.arange(n), latest_idx], np.nan)
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            volatility = np.where(valid.sum(axis=1) >= 2, np.nanstd(changes, axis=1), np.nan)
+
+    return {
+        'yoy_growth': yoy,
+        'flat_cagr': _cagr(flat, years),
+        'office_cagr': _cagr(series['office'], years),
+        'shop_cagr': _cagr(series['shop'], years),
+        'sales_trend': _trend(series['sales'], years),
+        'units_trend': _trend(series['units'], years),
+        'volatility': volatility,
+    }
+
+
+class MarketAnalytics:
+    """Area x year matrices for one dataset generation, ranked on demand"""
+
+    def __init__(self, df):
+        self.areas = np.sort(df['area'].unique())
+        self.years = np.sort(df['year'].astype(int).unique())
+        self.series = _frame_series(df, self.areas, self.years)
+        self._range_cache = {}
+        self._lock = threading.Lock()
+
+    def updated(self, df, areas):
+        """
+        Copy for the next generation with only the given areas recomputed.
+
+        Only those areas have rows in any new year, so a new year column is
+        inserted empty for every other area. A new area changes the row
+        set, so that rebuilds.
+        """
+        areas = np.sort(np.asarray(areas, dtype=object))
+        if not len(self.years) or not np.isin(areas, self.areas).all():
+            return MarketAnalytics(df)
+        uploaded_years = df.loc[df['area'].isin(areas), 'year'].astype(int).unique()
+        years = np.union1d(self.years, uploaded_years)
+
+        clone = object.__new__(MarketAnalytics)
+        clone.areas = self.areas
+        clone.years = years
+        clone._lock = threading.Lock()
+
+        rows = np.searchsorted(self.areas, areas)
+        cols = np.searchsorted(years, self.years)
+        fresh = _frame_series(df[df['area'].isin(areas)], areas, years)
+        clone.series = {}
+        for name, matrix in self.series.items():
+            grown = np.full((len(self.areas), len(years)), np.nan)
+            grown[:, cols] = matrix
+            grown[rows] = fresh[name]
+            clone.series[name] = grown
+
+        # Cached ranges keep their columns when years are only appended, and
+        # an open-ended range also covers the new ones (empty for unchanged
+        # areas, so their metrics stand). Years inserted before the end
+        # shift every range, so those are left to recompute on demand.
+        clone._range_cache = {}
+        added = np.setdiff1d(uploaded_years, self.years)
+        if added.size and added.min() < self.years[-1]:
+            return clone
+        with self._lock:
+            cached_ranges = list(self._range_cache.items())
+        for (lo, hi), cached in cached_ranges:
+            ranges = [(lo, hi)] + ([(lo, len(years))] if hi == len(self.years) < len(years) else [])
+            for span in ranges:
+                subset = compute_metrics(
+                    {n: m[:, span[0]:span[1]] for n, m in fresh.items()}, years[span[0]:span[1]]
+                )
+                result = {}
+                for name, values in cached.items():
+                    values = values.copy()
+                    values[rows] = subset[name]
+                    result[name] = values
+                clone._range_cache[span] = result
+        return clone
+
+    def year_slice(self, start=None, end=None):
+        """Column slice for an inclusive year range via binary search"""
+        lo = 0 if start is None else int(np.searchsorted(self.years, start, side='left'))
+        hi = len(self.years) if end is None else int(np.searchsorted(self.years, end, side='right'))
+        return slice(lo, hi)
+
+    def metrics(self, start=None, end=None):
+        """All metrics for all areas over a year range, memoised per range"""
+        cols = self.year_slice(start, end)
+        key = (cols.start, cols.stop)
+        cached = self._range_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = compute_metrics({n: m[:, cols] for n, m in self.series.items()}, self.years[cols])
+        with self._lock:
+            self._range_cache[key] = result
+        return result
+
+    def rank(self, metric, k=10, start=None, end=None, ascending=False):
+        """Top-k areas by metric over a year range, skipping areas without a value"""
+        all_metrics = self.metrics(start, end)
+        values = all_metrics[metric]
+        candidates = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[candidates], kind='stable')
+        if not ascending:
+            order = order[::-1]
+        top = candidates[order[:k]]
+
+        return [
+            {
+                'rank': position + 1,
+                'area': str(self.areas[i]),
+                'value': values[i].round(2),
+                'metrics': {name: series[i].round(2) for name, series in all_metrics.items()},
+            }
+            for position, i in enumerate(top)
+        ]
+
+
+def get_market_analytics(dataset):
+    """MarketAnalytics for a Dataset, built once per generation"""
+    return dataset.derived(
+        'analytics',
+        lambda d: MarketAnalytics(d.df),
+        lambda analytics, d, areas: analytics.updated(d.df, areas),
+    )
@@ -0,0 +1,450 @@
+"""
+Dataset Registry for Real Estate Chatbot
+Maps dataset ids to source workbooks, loads them lazily and evicts
+least-recently-used datasets when the configured memory budget is exceeded
+
+pandas is imported inside the loading functions so that importing the
+registry (URL resolution, health checks) stays cheap.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from django.conf import settings
+
+import io
+import os
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows dev servers run one process
+    fcntl = None
+
+# ========================
+# Loading
+# ========================
+
+COLUMN_MAPPING = {
+    'final location': 'area',
+    'total_sales - igr': 'total_sales',
+    'total sold - igr': 'total_sold',
+    'flat - weighted average rate': 'flat_avg_rate',
+    'office - weighted average rate': 'office_avg_rate',
+    'shop - weighted average rate': 'shop_avg_rate',
+    'total carpet area supplied (sqft)': 'total_carpet_area',
+}
+
+NUMERIC_COLUMNS = ['total_sales', 'total_sold', 'flat_avg_rate', 'office_avg_rate',
+                   'shop_avg_rate', 'total_carpet_area']
+
+
+# Columns persisted in a dataset's overlay of uploaded rows
+OVERLAY_COLUMNS = ['area', 'year'] + NUMERIC_COLUMNS
+
+
+def normalize_frame(df):
+    """Rename source columns and coerce area/numeric values the way the API expects"""
+    import pandas as pd
+
+    df.columns = df.columns.astype(str).str.strip()
+
+    for old_name, new_name in COLUMN_MAPPING.items():
+        if old_name in df.columns:
+            df.rename(columns={old_name: new_name}, inplace=True)
+
+    df = df.dropna(subset=['area', 'year'])
+    df['area'] = df['area'].astype(str).str.strip()
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            if df[col].dtype == 'object':
+                df[col] = df[col].astype(str).str.replace(',', '').replace('', '0')
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    return df
+
+
+def load_excel_data(path=None):
+    """Load Excel dataset and return DataFrame"""
+    import pandas as pd
+
+    path = path or settings.DATASETS[settings.DEFAULT_DATASET]
+    try:
+        if not os.path.exists(path):
+            print(f"❌ ERROR: Excel file not found at {path}")
+            return None
+
+        df = normalize_frame(pd.read_excel(path))
+
+        print(f"✅ Successfully loaded {len(df)} records from {df['area'].nunique()} areas")
+        return df
+
+    except Exception as e:
+        print(f"❌ ERROR loading Excel: {str(e)}")
+        return None
+
+# ========================
+# Overlay of uploaded rows
+# ========================
+
+def overlay_path(path):
+    """Append-only CSV of rows uploaded on top of a source workbook"""
+    return f"{path}.updates.csv"
+
+
+@contextmanager
+def _file_lock(f, exclusive):
+    """flock f so uploads from several worker processes never interleave"""
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def append_overlay(path, rows):
+    """Persist normalised rows so reloads and other workers see them"""
+    # One pre-encoded blob per upload, written under an exclusive lock
+    blob = rows.reindex(columns=OVERLAY_COLUMNS).to_csv(header=False, index=False, lineterminator='\n')
+    with open(overlay_path(path), 'ab') as f:
+        with _file_lock(f, exclusive=True):
+            f.write(blob.encode('utf-8'))
+            f.flush()
+
+
+def read_overlay(path, offset=0):
+    """
+    Read overlay rows appended after byte offset.
+
+    Returns:
+        (DataFrame or None, new offset) - only complete lines are consumed
+    """
+    import pandas as pd
+
+    overlay = overlay_path(path)
+    if not os.path.exists(overlay):
+        return None, offset
+    size = os.path.getsize(overlay)
+    if size <= offset:
+        return None, offset
+
+    with open(overlay, 'rb') as f:
+        # Shared lock: never read an upload another worker is halfway through
+        with _file_lock(f, exclusive=False):
+            f.seek(offset)
+            chunk = f.read()
+    end = chunk.rfind(b'\n') + 1
+    if end == 0:
+        return None, offset
+
+    rows = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=OVERLAY_COLUMNS,
+                       dtype={'area': str})
+    return rows.drop_duplicates(['area', 'year'], keep='last'), offset + end
+
+
+def merge_rows(df, rows):
+    """
+    Upsert rows into df by (area, year). Columns missing from rows keep
+    their existing values; only the touched rows are rebuilt.
+    """
+    import pandas as pd
+
+    keys = ['area', 'year']
+    old = df.set_index(keys)
+    new = rows.set_index(keys)
+    overlap = old.index.isin(new.index)
+
+    existing = old[overlap]
+    existing = existing[~existing.index.duplicated(keep='last')]
+    updated = existing.reindex(index=new.index, columns=old.columns.union(new.columns, sort=False))
+    updated.update(new)
+    numeric = [c for c in NUMERIC_COLUMNS if c in updated.columns]
+    updated[numeric] = updated[numeric].fillna(0)
+
+    return pd.concat([old[~overlap], updated]).reset_index()
+
+# ========================
+# Registry
+# ========================
+
+def estimate_bytes(value, seen=None):
+    """
+    Approximate memory held by a derived value: array and frame buffers plus
+    the containers and attributes around them. Objects reached twice (via
+    seen) count once; a memory_bytes() method overrides the walk.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if callable(getattr(value, 'memory_bytes', None)):
+        return int(value.memory_bytes())
+    if hasattr(value, 'memory_usage'):
+        # Derived frames share the source frame's area strings, so no deep walk
+        usage = value.memory_usage(deep=False)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.items())
+        size += sum(estimate_bytes(k, seen) + estimate_bytes(v, seen) for k, v in items)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_bytes(item, seen) for item in list(value))
+    elif hasattr(value, '__dict__'):
+        size += estimate_bytes(vars(value), seen)
+    return size
+
+
+class UnknownDataset(KeyError):
+    """Raised when a dataset id is not configured"""
+
+
+class Dataset:
+    """A loaded dataset plus anything derived from it for the current generation"""
+
+    def __init__(self, dataset_id, path, df, generation, overlay_offset=0, on_derived=None):
+        self.id = dataset_id
+        self.path = path
+        self.df = df
+        self.generation = generation
+        self.overlay_offset = overlay_offset
+        self.memory_bytes = int(df.memory_usage(deep=True).sum())
+        # Called with the dataset after each new derived value, e.g. to re-check the budget
+        self.on_derived = on_derived
+        self._derived = {}
+        self._updaters = {}
+        # Size of each derived value, measured once when it is built
+        self._sizes = {}
+        # Re-entrant: builders may depend on other derived values
+        self._lock = threading.RLock()
+
+    def derived(self, key, builder, updater=None):
+        """
+        Return builder(self), computed once per dataset generation.
+
+        updater(previous_value, dataset, areas) lets the value be carried
+        into the next generation by recomputing only the changed areas;
+        without one the value is rebuilt from scratch on first use.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._lock:
+            built = key not in self._derived
+            if built:
+                self._derived[key] = builder(self)
+                if updater is not None:
+                    self._updaters[key] = updater
+            value = self._derived[key]
+        if built:
+            self._measure(key)
+            if self.on_derived is not None:
+                self.on_derived(self)
+        return value
+
+    def _measure(self, key):
+        # The source frame and values shared with other keys are counted once
+        seen = {id(self.df)} | {id(v) for k, v in list(self._derived.items()) if k != key}
+        self._sizes[key] = estimate_bytes(self._derived[key], seen)
+
+    def cached(self, key):
+        """The derived value for key if already built, else None"""
+        return self._derived.get(key)
+
+    def derived_bytes(self):
+        """Size of each derived value as measured when it was built or carried over"""
+        return dict(self._sizes)
+
+    @property
+    def total_bytes(self):
+        """Frame plus everything derived from it - what the memory budget is charged"""
+        return self.memory_bytes + sum(self._sizes.values())
+
+    def inherit(self, previous, areas):
+        """Carry derived values over from the previous generation, updating only areas"""
+        # Insertion order puts dependencies first, so updaters can rely on them
+        for key, value in previous._derived.items():
+            updater = previous._updaters.get(key)
+            if updater is not None:
+                self._derived[key] = updater(value, self, areas)
+                self._updaters[key] = updater
+                self._measure(key)
+
+
+class DatasetRegistry:
+    """Lazily loads datasets by id and keeps their total size under a memory budget"""
+
+    def __init__(self, sources, memory_budget_bytes, loader=load_excel_data):
+        self.sources = dict(sources)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {dataset_id: threading.Lock() for dataset_id in self.sources}
+        self._generation = 0
+        self._load_hooks = []
+        self._metrics = {
+            dataset_id: {'loads': 0, 'evictions': 0, 'hits': 0, 'updates': 0,
+                         'lastLoadSeconds': None, 'lastUpdateSeconds': None}
+            for dataset_id in self.sources
+        }
+
+    def get(self, dataset_id):
+        """Return the Dataset for dataset_id, loading it on first use (None if loading fails)"""
+        if dataset_id not in self.sources:
+            raise UnknownDataset(dataset_id)
+
+        with self._lock:
+            dataset = self._loaded.get(dataset_id)
+            if dataset is not None:
+                self._loaded.move_to_end(dataset_id)
+                self._metrics[dataset_id]['hits'] += 1
+        if dataset is not None:
+            return self._sync_overlay(dataset)
+
+        with self._load_locks[dataset_id]:
+            with self._lock:
+                dataset = self._loaded.get(dataset_id)
+                if dataset is not None:
+                    self._loaded.move_to_end(dataset_id)
+                    self._metrics[dataset_id]['hits'] += 1
+                    return dataset
+
+            started = time.perf_counter()
+            path = self.sources[dataset_id]
+            df = self.loader(path)
+            if df is None:
+                return None
+            rows, offset = read_overlay(path)
+            if rows is not None:
+                df = merge_rows(df, rows)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._generation += 1
+                generation = self._generation
+            # Sizing the frame walks every string, so keep it outside the lock
+            dataset = Dataset(dataset_id, path, df, generation, offset, self._derived_built)
+            with self._lock:
+                self._loaded[dataset_id] = dataset
+                metrics = self._metrics[dataset_id]
+                metrics['loads'] += 1
+                metrics['lastLoadSeconds'] = round(elapsed, 4)
+                self._evict_over_budget(keep=dataset_id)
+            self._run_load_hooks(dataset)
+            return dataset
+
+    def on_load(self, hook):
+        """Call hook(dataset) for every newly loaded or updated generation, before it is served"""
+        self._load_hooks.append(hook)
+
+    def _run_load_hooks(self, dataset):
+        for hook in self._load_hooks:
+            try:
+                hook(dataset)
+            except Exception as e:
+                print(f"❌ Load hook {hook.__name__} failed for dataset '{dataset.id}': {str(e)}")
+
+    def peek(self, dataset_id):
+        """The loaded Dataset for dataset_id, or None - never loads or touches LRU order"""
+        with self._lock:
+            return self._loaded.get(dataset_id)
+
+    def _sync_overlay(self, dataset):
+        """Apply overlay rows appended since this dataset was built (e.g. by another worker)"""
+        overlay = overlay_path(dataset.path)
+        if not os.path.exists(overlay) or os.path.getsize(overlay) <= dataset.overlay_offset:
+            return dataset
+
+        with self._load_locks[dataset.id]:
+            with self._lock:
+                current = self._loaded.get(dataset.id, dataset)
+            rows, offset = read_overlay(current.path, current.overlay_offset)
+            if rows is None:
+                return current
+
+            started = time.perf_counter()
+            df = merge_rows(current.df, rows)
+            with self._lock:
+                self._generation += 1
+                generation = self._generation
+            updated = Dataset(current.id, current.path, df, generation, offset, self._derived_built)
+            updated.inherit(current, sorted(rows['area'].unique()))
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._loaded[current.id] = updated
+                self._loaded.move_to_end(current.id)
+                metrics = self._metrics[current.id]
+                metrics['updates'] += 1
+                metrics['lastUpdateSeconds'] = round(elapsed, 4)
+                self._evict_over_budget(keep=current.id)
+            print(f"✅ Merged {len(rows)} uploaded records into dataset '{current.id}'")
+            self._run_load_hooks(updated)
+            return updated
+
+    def evict(self, dataset_id):
+        """Drop a loaded dataset so the next request reloads it"""
+        with self._lock:
+            if self._loaded.pop(dataset_id, None) is not None:
+                self._metrics[dataset_id]['evictions'] += 1
+
+    def _derived_built(self, dataset):
+        """Derived values grow a dataset after loading, so re-check the budget"""
+        with self._lock:
+            if self._loaded.get(dataset.id) is dataset:
+                self._evict_over_budget(keep=dataset.id)
+
+    def _evict_over_budget(self, keep):
+        sizes = {dataset_id: d.total_bytes for dataset_id, d in self._loaded.items()}
+        total = sum(sizes.values())
+        for dataset_id in list(self._loaded):
+            if total <= self.memory_budget_bytes:
+                break
+            if dataset_id == keep:
+                continue
+            self._loaded.pop(dataset_id)
+            total -= sizes[dataset_id]
+            self._metrics[dataset_id]['evictions'] += 1
+            print(f"♻️ Evicted dataset '{dataset_id}' to stay within memory budget")
+
+    def stats(self):
+        """Per-dataset load/evict metrics and current memory use"""
+        with self._lock:
+            datasets = []
+            used = 0
+            for dataset_id, path in self.sources.items():
+                dataset = self._loaded.get(dataset_id)
+                derived = dataset.derived_bytes() if dataset else {}
+                memory = dataset.memory_bytes + sum(derived.values()) if dataset else 0
+                used += memory
+                datasets.append({
+                    'id': dataset_id,
+                    'source': os.path.basename(str(path)),
+                    'loaded': dataset is not None,
+                    'generation': dataset.generation if dataset else None,
+                    'memoryBytes': memory,
+                    'derivedBytes': derived,
+                    **self._metrics[dataset_id],
+                })
+            return {
+                'default': settings.DEFAULT_DATASET,
+                'memoryBudgetBytes': self.memory_budget_bytes,
+                'memoryUsedBytes': used,
+                'datasets': datasets,
+            }
+
+
+registry = DatasetRegistry(
+    settings.DATASETS,
+    memory_budget_bytes=settings.DATASET_MEMORY_BUDGET_MB * 1024 * 1024,
+)
@@ -0,0 +1,375 @@
+"""
+Price and Volume Forecasting for Real Estate Chatbot
+Linear-trend and Holt (double exponential smoothing) projections with
+intervals for every area at once. Each model is fitted to the whole
+area x year matrix per series; only the handful of year columns is
+iterated, never the areas. Fitted states are kept per generation and
+projected to each horizon on demand.
+"""
+
+import numpy as np
+import threading
+import warnings
+
+from .analytics import get_market_analytics
+
+FORECAST_SERIES = ['flat', 'office', 'shop', 'sales', 'units']
+
+MODELS = {
+    'linear': 'Least-squares linear trend',
+    'holt': "Holt's linear exponential smoothing",
+}
+
+MAX_HORIZON = 5
+
+# Holt smoothing parameters tried per area; the pair with the lowest
+# one-step-ahead squared error wins
+HOLT_ALPHAS = np.array([0.2, 0.4, 0.6, 0.8])
+HOLT_BETAS = np.array([0.1, 0.3, 0.5])
+
+# Two-sided 95% Student-t quantiles for 1-30 degrees of freedom
+_T_975 = np.array([
+    np.nan, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+
+
+def t_quantile(dof):
+    """95% two-sided t quantile per element of dof (NaN below 1, ~normal above 30)"""
+    dof = np.asarray(dof)
+    quantile = np.where(dof > 30, 1.96, _T_975[np.clip(dof, 0, 30).astype(int)])
+    return np.where(dof >= 1, quantile, np.nan)
+
+
+def _last_year(years):
+    return int(years[-1]) if len(years) else None
+
+
+def contiguous_years(matrix, years):
+    """Spread columns over every year from first to last, NaN for missing years"""
+    if len(years) == 0:
+        return matrix, years
+    span = np.arange(years[0], years[-1] + 1)
+    full = np.full((matrix.shape[0], len(span)), np.nan)
+    full[:, years - years[0]] = matrix
+    return full, span
+
+
+def linear_state(matrix, years):
+    """Least-squares line per row: what project_linear needs, for any target year"""
+    valid = ~np.isnan(matrix)
+    count = valid.sum(axis=1)
+    x = np.where(valid, years.astype(float), np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        x_mean = np.nanmean(x, axis=1)
+        y_mean = np.nanmean(matrix, axis=1)
+        dx = x - x_mean[:, None]
+        sxx = np.nansum(dx ** 2, axis=1)
+        slope = np.nansum(dx * (matrix - y_mean[:, None]), axis=1) / sxx
+        intercept = y_mean - slope * x_mean
+
+        residuals = matrix - (intercept[:, None] + slope[:, None] * x)
+        sigma = np.sqrt(np.nansum(residuals ** 2, axis=1) / (count - 2))
+    return {'slope': slope, 'intercept': intercept, 'x_mean': x_mean, 'sxx': sxx, 'sigma': sigma, 'count': count}
+
+
+def project_linear(state, last_year, horizon):
+    """
+    Linear-trend projection horizon years past last_year.
+
+    Returns:
+        dict of point, lower, upper arrays (NaN where a row has < 2 points;
+        no interval below 3)
+    """
+    count = state['count']
+    target = float(last_year + horizon) if last_year is not None else np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        point = state['intercept'] + state['slope'] * target
+        margin = t_quantile(count - 2) * state['sigma'] * np.sqrt(
+            1 + 1 / count + (target - state['x_mean']) ** 2 / state['sxx']
+        )
+    point = np.where(count >= 2, point, np.nan)
+    margin = np.where(count >= 3, margin, np.nan)
+    return {'point': point, 'lower': point - margin, 'upper': point + margin}
+
+
+def fit_linear(matrix, years, horizon):
+    """Least-squares line per row, projected horizon years past the last column"""
+    return project_linear(linear_state(matrix, years), _last_year(years), horizon)
+
+
+def holt_state(matrix, years):
+    """
+    Holt's linear method per row over consecutive years, smoothing
+    parameters chosen per row from HOLT_ALPHAS x HOLT_BETAS.
+
+    Missing years advance the level by the trend without an update. The
+    first two observations seed the level and per-year trend.
+
+    Returns:
+        dict of the chosen level/trend at the last year, smoothing
+        parameters and one-step error stats per row
+    """
+    matrix, years = contiguous_years(matrix, years)
+    n = matrix.shape[0]
+    alpha = np.repeat(HOLT_ALPHAS, len(HOLT_BETAS))[:, None]
+    beta = np.tile(HOLT_BETAS, len(HOLT_ALPHAS))[:, None]
+    grid = len(alpha)
+
+    level = np.full((grid, n), np.nan)
+    trend = np.zeros((grid, n))
+    seen = np.zeros(n, dtype=int)
+    first_col = np.zeros(n, dtype=int)
+    sse = np.zeros((grid, n))
+    errors = np.zeros(n, dtype=int)
+
+    for col in range(matrix.shape[1]):
+        y = matrix[:, col]
+        valid = ~np.isnan(y)
+        running = seen >= 2
+        forecast = level + trend
+
+        update = running & valid
+        error = np.where(update, y - forecast, 0.0)
+        sse += error ** 2
+        errors += update
+
+        new_level = alpha * y + (1 - alpha) * forecast
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        level = np.where(update, new_level, np.where(running, forecast, level))
+        trend = np.where(update, new_trend, trend)
+
+        # Second observation seeds the trend, first seeds the level
+        second = (seen == 1) & valid
+        trend = np.where(second, (y - level) / np.maximum(col - first_col, 1), trend)
+        level = np.where(second | ((seen == 0) & valid), y, level)
+        first_col = np.where((seen == 0) & valid, col, first_col)
+        seen += valid
+
+    # Best smoothing pair per row (middle of the grid when nothing to score)
+    best = np.where(errors > 0, np.argmin(sse, axis=0), grid // 2)
+    rows = np.arange(n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(sse[best, rows] / errors)
+    return {
+        'level': level[best, rows], 'trend': trend[best, rows],
+        'alpha': alpha[best, 0], 'beta': beta[best, 0],
+        'sigma': sigma, 'errors': errors, 'seen': seen,
+    }
+
+
+def advance_holt(state, steps):
+    """Holt state after steps more years without an observation"""
+    level = state['level']
+    running = state['seen'] >= 2
+    for _ in range(steps):
+        level = np.where(running, level + state['trend'], level)
+    return {**state, 'level': level}
+
+
+def project_holt(state, last_year, horizon):
+    """
+    Holt projection horizon years past the state's last year.
+
+    Returns:
+        dict of point, lower, upper arrays (NaN where a row has < 2 points;
+        no interval until there is a one-step error to estimate it from)
+    """
+    a, b = state['alpha'], state['beta']
+    point = state['level'] + horizon * state['trend']
+    steps = np.arange(1, horizon)[:, None]
+    variance_factor = 1 + ((a * (1 + steps * b)) ** 2).sum(axis=0)
+    margin = t_quantile(state['errors']) * state['sigma'] * np.sqrt(variance_factor)
+
+    point = np.where(state['seen'] >= 2, point, np.nan)
+    margin = np.where(state['errors'] > 0, margin, np.nan)
+    return {'point': point, 'lower': point - margin, 'upper': point + margin}
+
+
+def fit_holt(matrix, years, horizon):
+    """Holt's linear method per row, projected horizon years past the last column"""
+    return project_holt(holt_state(matrix, years), _last_year(years), horizon)
+
+
+# model -> (fit a state from an area x year matrix, project a state)
+FITTERS = {
+    'linear': (linear_state, project_linear),
+    'holt': (holt_state, project_holt),
+}
+
+
+def latest_values(matrix):
+    """Last observed value per row (NaN if none)"""
+    if matrix.shape[1] == 0:
+        return np.full(matrix.shape[0], np.nan)
+    valid = ~np.isnan(matrix)
+    last_idx = matrix.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    latest = matrix[np.arange(matrix.shape[0]), last_idx]
+    return np.where(valid.any(axis=1), latest, np.nan)
+
+
+def fit_all(series, years):
+    """
+    Every model's state for every series in series (name -> area x year
+    matrix), plus each row's latest observed value.
+
+    Returns:
+        {series: {'latest': array, model: state}}
+    """
+    return {
+        name: {
+            'latest': latest_values(series[name]),
+            **{model: fit(series[name], years) for model, (fit, _) in FITTERS.items()},
+        }
+        for name in FORECAST_SERIES
+    }
+
+
+def project_all(fits, last_year, horizon):
+    """
+    Project fit_all states horizon years past last_year.
+
+    Returns:
+        {series: {model: {point, lower, upper, change}}}, change being the
+        projected % change from the latest observed value
+    """
+    result = {}
+    for name, fitted in fits.items():
+        latest = fitted['latest']
+        result[name] = {}
+        for model, (_, project) in FITTERS.items():
+            values = project(fitted[model], last_year, horizon)
+            # Prices and volumes can't go negative
+            values = {key: np.maximum(array, 0) for key, array in values.items()}
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values['change'] = np.where(latest > 0, (values['point'] - latest) / latest * 100, np.nan)
+            result[name][model] = values
+    return result
+
+
+def forecast_all(series, years, horizon):
+    """Every model for every series, horizon years past the last year (see project_all)"""
+    return project_all(fit_all(series, years), _last_year(years), horizon)
+
+
+class BatchForecaster:
+    """
+    Forecasts for every area of one dataset generation. Models are fitted
+    once; each horizon is a cheap projection of the fitted states, memoised.
+    """
+
+    def __init__(self, analytics, fits=None):
+        self.analytics = analytics
+        self.areas = analytics.areas
+        self.years = analytics.years
+        self._lookup = {str(area).lower(): i for i, area in enumerate(self.areas)}
+        self._fits = fits
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def target_year(self, horizon=1):
+        """Calendar year a horizon points at"""
+        return int(self.years[-1]) + horizon if len(self.years) else None
+
+    def fits(self):
+        """fit_all states for every area, fitted on first use"""
+        if self._fits is None:
+            fits = fit_all(self.analytics.series, self.years)
+            with self._lock:
+                if self._fits is None:
+                    self._fits = fits
+        return self._fits
+
+    def updated(self, analytics, areas):
+        """
+        Copy for the next generation refitting only the given areas.
+
+        New year columns hold nothing for the other areas, so their linear
+        fits carry over as they are and their Holt states just advance
+        through the empty years to the new latest year.
+        """
+        if self._fits is None or not np.array_equal(analytics.areas, self.areas) \
+                or not len(self.years) or not len(analytics.years):
+            return BatchForecaster(analytics)
+
+        rows = np.searchsorted(self.areas, np.sort(np.asarray(areas, dtype=object)))
+        fresh = fit_all({name: analytics.series[name][rows] for name in FORECAST_SERIES}, analytics.years)
+        steps = int(analytics.years[-1]) - int(self.years[-1])
+
+        fits = {}
+        for name, fitted in self._fits.items():
+            fits[name] = {}
+            for key, state in fitted.items():
+                if key == 'holt':
+                    state = advance_holt(state, steps)
+                if key == 'latest':
+                    state = state.copy()
+                    state[rows] = fresh[name][key]
+                else:
+                    state = {field: array.copy() for field, array in state.items()}
+                    for field, array in state.items():
+                        array[rows] = fresh[name][key][field]
+                fits[name][key] = state
+        return BatchForecaster(analytics, fits)
+
+    def forecasts(self, horizon=1):
+        """All series x models for all areas, horizon years past the latest year"""
+        cached = self._cache.get(horizon)
+        if cached is not None:
+            return cached
+        result = project_all(self.fits(), _last_year(self.years), horizon)
+        with self._lock:
+            self._cache[horizon] = result
+        return result
+
+    def find(self, name):
+        """Row index for an area name (case-insensitive) or None"""
+        return self._lookup.get(name.strip().lower())
+
+    def for_area(self, row, horizon=1, series=None, models=None):
+        """{series: {model: {value, lower, upper, change}}} for one area row"""
+        forecasts = self.forecasts(horizon)
+        return {
+            name: {
+                model: {
+                    'value': values['point'][row].round(2),
+                    'lower': values['lower'][row].round(2),
+                    'upper': values['upper'][row].round(2),
+                    'change': values['change'][row].round(2),
+                }
+                for model, values in forecasts[name].items() if not models or model in models
+            }
+            for name in FORECAST_SERIES if not series or name in series
+        }
+
+    def rank(self, series='flat', model='holt', horizon=1, k=10, ascending=False):
+        """Top-k areas by projected % change, skipping areas without a forecast"""
+        values = self.forecasts(horizon)[series][model]
+        change = values['change']
+        candidates = np.flatnonzero(~np.isnan(change))
+        order = np.argsort(change[candidates], kind='stable')
+        if not ascending:
+            order = order[::-1]
+        return [
+            {
+                'rank': position + 1,
+                'area': str(self.areas[i]),
+                'value': values['point'][i].round(2),
+                'lower': values['lower'][i].round(2),
+                'upper': values['upper'][i].round(2),
+                'change': change[i].round(2),
+            }
+            for position, i in enumerate(candidates[order[:k]])
+        ]
+
+
+def get_forecaster(dataset):
+    """BatchForecaster for a Dataset, built once per generation"""
+    return dataset.derived(
+        'forecasts',
+        lambda d: BatchForecaster(get_market_analytics(d)),
+        lambda forecaster, d, areas: forecaster.updated(get_market_analytics(d), areas),
+    )
@@ -1,11 +1,23 @@
 """
 Groq LLM Integration for AI-Powered Summaries
+The Groq SDK (and its httpx/pydantic stack) is imported on first use
 """
 
-from groq import Groq
 from django.conf import settings
 import os
 
+_client = None
+
+
+def get_client():
+    """Shared Groq client, created on the first summary request"""
+    global _client
+    if _client is None:
+        from groq import Groq
+        _client = Groq(api_key=settings.GROQ_API_KEY)
+    return _client
+
+
 def generate_ai_summary(data_dict):
     """
     Generate AI-powered summary using Groq LLM
@@ -18,7 +30,7 @@ def generate_ai_summary(data_dict):
     """
     try:
         # Initialize Groq client
-        client = Groq(api_key=settings.GROQ_API_KEY)
+        client = get_client()
         
         # Prepare data for prompt
         area = data_dict.get('area', 'Unknown')
@@ -87,7 +99,7 @@ def generate_comparison_summary(areas_data):
         str: AI-generated comparison analysis
     """
     try:
-        client = Groq(api_key=settings.GROQ_API_KEY)
+        client = get_client()
         
         # Build comparison data
         comparison_text = "\n".join([
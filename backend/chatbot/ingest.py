@@ -0,0 +1,115 @@
+"""
+Upload Ingestion for Real Estate Chatbot
+Streams uploaded xlsx/CSV files in bounded chunks and validates them
+against the dataset column mapping
+"""
+
+from django.conf import settings
+from openpyxl import load_workbook
+
+import pandas as pd
+
+from .datasets import COLUMN_MAPPING, NUMERIC_COLUMNS, OVERLAY_COLUMNS, normalize_frame
+
+
+class UploadError(ValueError):
+    """Raised when an uploaded file cannot be ingested"""
+
+
+def _xlsx_chunks(uploaded, chunk_rows):
+    """Yield DataFrames of chunk_rows rows from the first sheet, read-only"""
+    workbook = load_workbook(uploaded, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else '' for h in header]
+
+        batch = []
+        for row in rows:
+            if any(value is not None for value in row):
+                batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def _csv_chunks(uploaded, chunk_rows):
+    """Yield DataFrames of chunk_rows rows from a CSV upload"""
+    try:
+        yield from pd.read_csv(uploaded, chunksize=chunk_rows, dtype=object, encoding='utf-8-sig')
+    except pd.errors.EmptyDataError:
+        return
+
+
+def _validate_chunk(chunk):
+    """Normalise one chunk and keep only the columns the API serves"""
+    headers = {COLUMN_MAPPING.get(str(h).strip(), str(h).strip()) for h in chunk.columns}
+    if 'area' not in headers or 'year' not in headers:
+        raise UploadError(
+            f"Missing required columns. Expected headers: {', '.join(COLUMN_MAPPING)} and 'year'"
+        )
+    if not any(col in headers for col in NUMERIC_COLUMNS):
+        raise UploadError(
+            f"No metric columns found. Expected at least one of: "
+            f"{', '.join(k for k, v in COLUMN_MAPPING.items() if v in NUMERIC_COLUMNS)}"
+        )
+
+    chunk = chunk.rename(columns=lambda h: COLUMN_MAPPING.get(str(h).strip(), str(h).strip()))
+    for column in ('area', 'year'):
+        blank = chunk[column].isna() | (chunk[column].astype(str).str.strip() == '')
+        if blank.any():
+            raise UploadError(f"Missing {column} in {int(blank.sum())} row(s)")
+
+    chunk = normalize_frame(chunk)
+    years = pd.to_numeric(chunk['year'], errors='coerce')
+    invalid = years.isna() | (years % 1 != 0)
+    if invalid.any():
+        raise UploadError(f"Invalid year in {int(invalid.sum())} row(s), e.g. {chunk['year'][invalid].iloc[0]!r}")
+    chunk['year'] = years.astype(int)
+
+    return chunk[[col for col in OVERLAY_COLUMNS if col in chunk.columns]]
+
+
+def read_upload(uploaded):
+    """
+    Parse an uploaded xlsx/CSV file into normalised area-year rows.
+
+    The file is read chunk by chunk (openpyxl read-only mode for xlsx),
+    so memory grows with the validated rows kept, never the raw workbook.
+
+    Returns:
+        DataFrame with one row per (area, year), later rows winning
+    """
+    name = (uploaded.name or '').lower()
+    chunk_rows = settings.UPLOAD_CHUNK_ROWS
+    if name.endswith('.xlsx'):
+        chunks = _xlsx_chunks(uploaded, chunk_rows)
+    elif name.endswith('.csv'):
+        chunks = _csv_chunks(uploaded, chunk_rows)
+    else:
+        raise UploadError('Only .xlsx and .csv files are supported')
+
+    frames, total = [], 0
+    try:
+        for chunk in chunks:
+            chunk = _validate_chunk(chunk)
+            total += len(chunk)
+            if total > settings.UPLOAD_MAX_ROWS:
+                raise UploadError(f'Upload exceeds {settings.UPLOAD_MAX_ROWS} rows')
+            frames.append(chunk)
+    except UploadError:
+        raise
+    except Exception as e:
+        raise UploadError(f'Could not read {uploaded.name}: {str(e)}')
+
+    if not total:
+        raise UploadError('No data rows found')
+
+    rows = pd.concat(frames, ignore_index=True)
+    return rows.drop_duplicates(['area', 'year'], keep='last')
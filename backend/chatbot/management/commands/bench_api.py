@@ -0,0 +1,85 @@
+"""
+Benchmark JSON rendering and bytes on the wire per API endpoint
+
+    python manage.py bench_api [--dataset pune] [--iterations 200]
+"""
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+import time
+
+from chatbot.datasets import registry
+from chatbot.middleware import brotli, compress
+from chatbot.renderers import FastJSONRenderer
+
+
+def _time_render(renderer, data, iterations):
+    """Mean render time in microseconds, or None if the renderer fails"""
+    try:
+        renderer.render(data)
+    except (TypeError, ValueError):
+        return None
+    started = time.perf_counter()
+    for _ in range(iterations):
+        renderer.render(data)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+class Command(BaseCommand):
+    help = 'Benchmark render time and response size (raw/gzip/brotli) for each API endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=None, help='Dataset id (defaults to DEFAULT_DATASET)')
+        parser.add_argument('--iterations', type=int, default=200, help='Renders per endpoint')
+
+    def handle(self, *args, **options):
+        dataset_id = options['dataset'] or next(iter(registry.sources))
+        loaded = registry.get(dataset_id)
+        if loaded is None:
+            self.stderr.write(f'Failed to load dataset {dataset_id}')
+            return
+
+        areas = sorted(loaded.df['area'].unique())
+        first = areas[0]
+        pair = ' vs '.join(areas[:2])
+        endpoints = [
+            ('GET', 'areas/', None),
+            ('GET', 'health/', None),
+            ('POST', 'analyze/', {'query': f'Analyze {first}'}),
+            ('POST', 'compare/', {'query': pair}),
+            ('GET', 'rankings/?k=50', None),
+            ('GET', f'areas/{first}/similar/?k=10', None),
+        ]
+
+        client = APIClient()
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        iterations = options['iterations']
+
+        header = f"{'endpoint':<28}{'stock µs':>10}{'fast µs':>10}{'raw B':>9}{'gzip B':>9}{'br B':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        # Pre-rendered analyze responses are plain bytes with no .data to re-render
+        with override_settings(ALLOWED_HOSTS=['testserver'], ANALYZE_PRERENDER=False):
+            for method, url, body in endpoints:
+                if method == 'GET':
+                    response = client.get(f'/api/{dataset_id}/{url}')
+                else:
+                    response = client.post(f'/api/{dataset_id}/{url}', body, format='json')
+                data = response.data
+
+                stock_us = _time_render(stock, data, iterations)
+                fast_us = _time_render(fast, data, iterations)
+                raw = fast.render(data)
+
+                self.stdout.write(
+                    f"{method + ' /' + url.split('?')[0]:<28}"
+                    f"{(f'{stock_us:.1f}' if stock_us is not None else 'fails'):>10}"
+                    f"{fast_us:>10.1f}"
+                    f"{len(raw):>9}"
+                    f"{len(compress(raw, 'gzip')):>9}"
+                    f"{(len(compress(raw, 'br')) if brotli is not None else '-'):>9}"
+                )
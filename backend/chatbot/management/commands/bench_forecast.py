@@ -0,0 +1,117 @@
+"""
+Benchmark batch forecasting over a synthetic catalogue
+
+    python manage.py bench_forecast [--areas 5000] [--years 10] [--missing 0.1]
+
+Fits every series x model for all areas with the vectorised fitters and
+times a sample of straightforward per-area loops (np.polyfit and a scalar
+Holt recursion) as the loop-per-area baseline. chatbot.tests checks that
+the two agree.
+"""
+
+from django.core.management.base import BaseCommand
+
+import time
+
+import numpy as np
+
+from chatbot.forecasting import (
+    FORECAST_SERIES, HOLT_ALPHAS, HOLT_BETAS, contiguous_years, fit_holt, fit_linear, forecast_all,
+)
+
+
+def synthetic_series(areas, years, missing, seed=0):
+    """Random-walk-with-drift matrices shaped like MarketAnalytics.series"""
+    rng = np.random.default_rng(seed)
+    series = {}
+    for name in FORECAST_SERIES:
+        base = rng.uniform(3000, 15000, size=(areas, 1))
+        drift = rng.normal(0.05, 0.04, size=(areas, 1))
+        noise = rng.normal(0, 0.03, size=(areas, len(years)))
+        matrix = base * np.exp(np.cumsum(drift + noise, axis=1))
+        matrix[rng.random(matrix.shape) < missing] = np.nan
+        series[name] = matrix
+    return series
+
+
+def reference_linear(row, years, horizon):
+    valid = ~np.isnan(row)
+    if valid.sum() < 2:
+        return np.nan
+    slope, intercept = np.polyfit(years[valid].astype(float), row[valid], 1)
+    return intercept + slope * (years[-1] + horizon)
+
+
+def reference_holt(row, years, horizon):
+    """Scalar Holt with the same seeding, gap handling and parameter grid"""
+    row, _ = contiguous_years(row[None, :], years)
+    row = row[0]
+    best = None
+    for alpha in HOLT_ALPHAS:
+        for beta in HOLT_BETAS:
+            level = trend = None
+            first_col, sse, errors = 0, 0.0, 0
+            for col, y in enumerate(row):
+                if level is not None and trend is not None:
+                    forecast = level + trend
+                    if np.isnan(y):
+                        level = forecast
+                        continue
+                    sse += (y - forecast) ** 2
+                    errors += 1
+                    new_level = alpha * y + (1 - alpha) * forecast
+                    trend = beta * (new_level - level) + (1 - beta) * trend
+                    level = new_level
+                elif not np.isnan(y):
+                    if level is None:
+                        level, first_col = y, col
+                    else:
+                        trend = (y - level) / max(col - first_col, 1)
+                        level = y
+            if trend is None:
+                return np.nan
+            if best is None or (errors and sse < best[0]):
+                best = (sse, level + horizon * trend)
+    return best[1]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-catalogue batch forecasting against per-area loops'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--areas', type=int, default=5000, help='Areas to synthesise')
+        parser.add_argument('--years', type=int, default=10, help='Years of history')
+        parser.add_argument('--missing', type=float, default=0.1, help='Fraction of missing area-years')
+        parser.add_argument('--horizon', type=int, default=1, help='Years ahead')
+        parser.add_argument('--sample', type=int, default=200, help='Areas timed with the per-area loops')
+
+    def handle(self, *args, **options):
+        areas, horizon = options['areas'], options['horizon']
+        years = np.arange(2024 - options['years'] + 1, 2025)
+        series = synthetic_series(areas, years, options['missing'])
+        self.stdout.write(
+            f"{areas} areas x {len(years)} years x {len(FORECAST_SERIES)} series, "
+            f"{options['missing']:.0%} missing"
+        )
+
+        started = time.perf_counter()
+        forecast_all(series, years, horizon)
+        batch = time.perf_counter() - started
+        self.stdout.write(f"  batch fit, all series x models: {batch * 1000:.1f} ms")
+
+        for model, fitter in (('linear', fit_linear), ('holt', fit_holt)):
+            started = time.perf_counter()
+            fitter(series['flat'], years, horizon)
+            self.stdout.write(f"  batch {model:<7} one series: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        sample = min(options['sample'], areas)
+        flat = series['flat'][:sample]
+        for model, reference in (('linear', reference_linear), ('holt', reference_holt)):
+            started = time.perf_counter()
+            for row in flat:
+                reference(row, years, horizon)
+            per_area = (time.perf_counter() - started) / sample
+            self.stdout.write(
+                f"  per-area {model:<6} loop: {per_area * 1e6:.0f} µs/area "
+                f"(~{per_area * areas * len(FORECAST_SERIES) * 1000:.0f} ms for the catalogue)"
+            )
@@ -0,0 +1,111 @@
+"""
+Benchmark building the pre-rendered analyze payload store
+
+    python manage.py bench_prerender [--areas 5000] [--workers 4] [--mmap-dir /tmp/payloads]
+
+Replicates the dataset's areas up to --areas, then reports build time
+(serial and process pool), store/index size, time to map a saved store,
+and the per-request cost of a lookup versus rendering live.
+"""
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+import os
+import random
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from chatbot.datasets import Dataset, registry
+from chatbot.payloads import PayloadStore, build_payload_store
+from chatbot.renderers import dumps
+from chatbot.views import build_analyze_payload, slice_area
+
+
+def _replicate(df, count):
+    """df with its areas copied under new names until there are count areas"""
+    areas = df['area'].unique()
+    copies = []
+    for i in range(-(-count // len(areas))):
+        copy = df.copy()
+        copy['area'] = copy['area'] + f' {i}'
+        copies.append(copy)
+    frame = pd.concat(copies, ignore_index=True)
+    keep = frame['area'].unique()[:count]
+    return frame[frame['area'].isin(keep)].reset_index(drop=True)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark build time, size and hot-path cost of the pre-rendered analyze store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=None, help='Dataset id (defaults to DEFAULT_DATASET)')
+        parser.add_argument('--areas', type=int, default=5000, help='Areas to synthesise')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Process pool size')
+        parser.add_argument('--mmap-dir', default=None, help='Also save and map the store from this directory')
+        parser.add_argument('--requests', type=int, default=500, help='Lookups to time')
+
+    def handle(self, *args, **options):
+        dataset_id = options['dataset'] or next(iter(registry.sources))
+        source = registry.get(dataset_id)
+        if source is None:
+            self.stderr.write(f'Failed to load dataset {dataset_id}')
+            return
+
+        df = _replicate(source.df, options['areas'])
+        dataset = Dataset(f'bench-{len(df)}', source.path, df, generation=0)
+        areas = df['area'].unique()
+        self.stdout.write(f"{len(areas)} areas, {len(df)} rows, frame {dataset.memory_bytes / 1e6:.1f} MB")
+
+        runs = [1] if options['workers'] <= 1 else [1, options['workers']]
+        store = None
+        for workers in runs:
+            with override_settings(ANALYZE_PRERENDER_DIR=''):
+                store = build_payload_store(dataset, workers=workers)
+            stats = store.stats()
+            self.stdout.write(
+                f"  build with {workers} worker(s): {stats['buildSeconds']:.2f}s "
+                f"({len(areas) / stats['buildSeconds']:.0f} areas/s)"
+            )
+
+        stats = store.stats()
+        self.stdout.write(
+            f"  store: {stats['bytes'] / 1e6:.2f} MB payloads + {stats['indexBytes'] / 1e6:.2f} MB index "
+            f"({stats['bytes'] / len(areas) / 1024:.1f} KB/area)"
+        )
+        self.stdout.write(f"  peak RSS (this process): {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+        if options['mmap_dir'] is not None:
+            directory = options['mmap_dir'] or tempfile.mkdtemp()
+            path = os.path.join(directory, f'{dataset.id}.payloads')
+            os.makedirs(directory, exist_ok=True)
+            started = time.perf_counter()
+            store.save(path)
+            saved = time.perf_counter() - started
+            started = time.perf_counter()
+            store = PayloadStore.load(path)
+            self.stdout.write(
+                f"  mmap: saved in {saved:.3f}s, mapped in {time.perf_counter() - started:.3f}s ({path})"
+            )
+
+        sample = random.Random(0).choices(list(areas), k=options['requests'])
+        query = 'Analyze {} trends'
+
+        started = time.perf_counter()
+        for area in sample:
+            store.render(area, query.format(area))
+        lookup_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        live_sample = sample[:max(1, len(sample) // 10)]
+        started = time.perf_counter()
+        for area in live_sample:
+            dumps(build_analyze_payload(dataset.id, area, slice_area(dataset, area), query.format(area)))
+        live_us = (time.perf_counter() - started) / len(live_sample) * 1e6
+
+        self.stdout.write(
+            f"  per request: lookup+splice {lookup_us:.1f} µs vs live render {live_us:.0f} µs "
+            f"({live_us / lookup_us:.0f}x)"
+        )
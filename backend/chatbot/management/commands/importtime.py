@@ -0,0 +1,122 @@
+"""
+Import-time profile of worker boot, built on `python -X importtime`
+
+    python manage.py importtime [--top 15] [--check]
+
+Each scenario runs in a fresh interpreter so module caching can't hide
+the cost. --check fails if URL resolution or the health endpoints pull in
+the heavy data/LLM stacks, which should only load on the paths that use
+them.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from collections import defaultdict
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'groq', 'httpx', 'pydantic']
+
+# Must stay out of the light scenarios
+FORBIDDEN = ['pandas', 'numpy', 'groq']
+
+BOOT = """
+import django
+django.setup()
+"""
+
+SCENARIOS = {
+    'boot': ('django.setup()', BOOT),
+    'urls': ('boot + resolve every API URL', BOOT + """
+from django.urls import resolve
+for path in ['/api/health/', '/api/datasets/', '/api/analyze/', '/api/areas/',
+             '/api/generate-summary/', '/api/pune/analyze/']:
+    resolve(path)
+"""),
+    'health': ('boot + GET /api/health/ and /api/datasets/', BOOT + """
+from django.conf import settings
+from django.test import Client
+settings.ALLOWED_HOSTS.append('testserver')
+client = Client()
+assert client.get('/api/health/').status_code == 200
+assert client.get('/api/datasets/').status_code == 200
+"""),
+}
+
+LIGHT_SCENARIOS = ['urls', 'health']
+
+REPORT = """
+import json, sys
+print('@@MODULES@@' + json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+
+def run_scenario(code):
+    """
+    Run code under -X importtime in a fresh interpreter.
+
+    Returns:
+        (per-module self time in µs, heavy modules imported)
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_api.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code + REPORT.format(heavy=HEAVY_MODULES)],
+        cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise CommandError(f'Scenario failed:\n{result.stderr[-2000:]}')
+
+    # "import time: self [us] | cumulative | imported package"
+    self_us = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        self_us[name.strip()] = int(self_time)
+
+    heavy = []
+    for line in result.stdout.splitlines():
+        if line.startswith('@@MODULES@@'):
+            heavy = json.loads(line[len('@@MODULES@@'):])
+    return self_us, heavy
+
+
+class Command(BaseCommand):
+    help = 'Profile import cost of worker boot and check light paths avoid pandas/NumPy/Groq'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Packages to list per scenario')
+        parser.add_argument('--check', action='store_true',
+                            help=f"Fail if {', '.join(LIGHT_SCENARIOS)} import {', '.join(FORBIDDEN)}")
+
+    def handle(self, *args, **options):
+        failures = []
+
+        for name, (description, code) in SCENARIOS.items():
+            self_us, heavy = run_scenario(code)
+
+            by_package = defaultdict(int)
+            for module, micros in self_us.items():
+                by_package[module.split('.')[0]] += micros
+            total_ms = sum(self_us.values()) / 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {description} - {total_ms:.1f} ms in {len(self_us)} modules'
+            ))
+            for package, micros in sorted(by_package.items(), key=lambda item: -item[1])[:options['top']]:
+                self.stdout.write(f'  {micros / 1000:>8.1f} ms  {package}')
+            self.stdout.write(f"  heavy modules loaded: {', '.join(heavy) or 'none'}\n")
+
+            if name in LIGHT_SCENARIOS:
+                leaked = [module for module in FORBIDDEN if module in heavy]
+                if leaked:
+                    failures.append(f"{name} imported {', '.join(leaked)}")
+
+        if options['check']:
+            if failures:
+                raise CommandError('; '.join(failures))
+            self.stdout.write(self.style.SUCCESS('Light paths are free of ' + ', '.join(FORBIDDEN)))
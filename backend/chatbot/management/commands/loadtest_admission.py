@@ -0,0 +1,149 @@
+"""
+Load-test admission control against a fake slow Groq upstream
+
+    python manage.py loadtest_admission [--workers 12] [--duration 20]
+        [--llm-rate 4] [--data-rate 20] [--llm-latency 2] [--llm-slowdown 1]
+
+Open-loop LLM and data traffic is pushed through a fixed pool of worker
+threads (standing in for gunicorn --threads), once with admission control
+on and once with it off. The fake upstream gets slower the more calls it
+has in flight, like a rate-limited LLM API.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import itertools
+import threading
+import time
+
+from chatbot import groq_helper
+from chatbot.admission import build_controller, controller
+from chatbot.datasets import registry
+
+
+class FakeGroq:
+    """Stands in for groq.Groq: latency = base + slowdown x calls in flight"""
+
+    def __init__(self, latency, slowdown):
+        self.latency = latency
+        self.slowdown = slowdown
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            delay = self.latency + self.slowdown * (self.in_flight - 1)
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        message = SimpleNamespace(content='Fake summary')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Compare data-endpoint latency under an LLM surge with admission control on and off'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=None, help='Dataset id (defaults to DEFAULT_DATASET)')
+        parser.add_argument('--workers', type=int, default=12, help='Worker threads serving requests')
+        parser.add_argument('--duration', type=float, default=20.0, help='Seconds of traffic per run')
+        parser.add_argument('--llm-rate', type=float, default=4.0, help='generate-summary requests per second')
+        parser.add_argument('--data-rate', type=float, default=20.0, help='analyze/areas requests per second')
+        parser.add_argument('--llm-latency', type=float, default=2.0, help='Fake upstream base latency (s)')
+        parser.add_argument('--llm-slowdown', type=float, default=1.0,
+                            help='Extra fake upstream latency per concurrent call (s)')
+
+    def handle(self, *args, **options):
+        dataset_id = options['dataset'] or settings.DEFAULT_DATASET
+        loaded = registry.get(dataset_id)
+        if loaded is None:
+            self.stderr.write(f'Failed to load dataset {dataset_id}')
+            return
+        area = sorted(loaded.df['area'].unique())[0]
+        self._data_requests = itertools.count()
+
+        previous_client = groq_helper._client
+        groq_helper._client = FakeGroq(options['llm_latency'], options['llm_slowdown'])
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                # Warm caches so the first data requests aren't timing a load
+                self._request(Client(), 'data', dataset_id, area)
+                for enabled in (True, False):
+                    self._run(enabled, dataset_id, area, options)
+        finally:
+            groq_helper._client = previous_client
+
+    def _request(self, client, kind, dataset_id, area):
+        if kind == 'llm':
+            return client.post(
+                f'/api/{dataset_id}/generate-summary/',
+                {'area': area, 'data': {}}, content_type='application/json',
+            )
+        if next(self._data_requests) % 2:
+            return client.get(f'/api/{dataset_id}/areas/')
+        return client.post(f'/api/{dataset_id}/analyze/', {'query': f'Analyze {area}'},
+                           content_type='application/json')
+
+    def _run(self, enabled, dataset_id, area, options):
+        # Fresh limits and counters for each run
+        controller.classes = build_controller().classes
+        local = threading.local()
+        results = {'llm': [], 'data': []}
+
+        def call(kind, submitted):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            response = self._request(local.client, kind, dataset_id, area)
+            results[kind].append((response.status_code, time.monotonic() - submitted))
+
+        # Open loop: arrivals don't wait for earlier requests to finish
+        arrivals = []
+        for kind, rate in (('llm', options['llm_rate']), ('data', options['data_rate'])):
+            if rate > 0:
+                arrivals += [(i / rate, kind) for i in range(int(options['duration'] * rate))]
+        arrivals.sort()
+
+        with override_settings(ADMISSION_CONTROL=enabled):
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                started = time.monotonic()
+                for at, kind in arrivals:
+                    delay = started + at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(call, kind, time.monotonic())
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Admission control {'ON' if enabled else 'OFF'} - {options['workers']} workers, "
+            f"{options['duration']:.0f}s"
+        ))
+        self.stdout.write(f"{'class':<8}{'requests':>10}{'ok':>7}{'503':>7}{'p50 s':>9}{'p95 s':>9}{'max s':>9}")
+        for kind, samples in results.items():
+            ok = [latency for code, latency in samples if code < 500]
+            self.stdout.write(
+                f"{kind:<8}{len(samples):>10}{len(ok):>7}"
+                f"{sum(1 for code, _ in samples if code == 503):>7}"
+                f"{_percentile(ok, 50):>9.2f}{_percentile(ok, 95):>9.2f}{max(ok, default=0):>9.2f}"
+            )
+        if enabled:
+            for name, stats in controller.stats()['classes'].items():
+                self.stdout.write(
+                    f"  {name:<12} limit={stats['limit']:<6} admitted={stats['admitted']:<5} "
+                    f"rejected={stats['rejected']:<5} shed={stats['shed']:<4} "
+                    f"timedOut={stats['timedOut']:<4} latency={stats['latencyMs']}ms"
+                )
+        self.stdout.write('')
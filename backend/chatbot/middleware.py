@@ -0,0 +1,159 @@
+"""
+Middleware for Real Estate Chatbot API
+"""
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+import gzip
+import time
+
+from .admission import controller
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+
+# Only responses under this path are compressed (see CompressionMiddleware)
+API_PREFIX = '/api/'
+
+
+def _accepted_encodings(header):
+    """Encodings the client accepts with a non-zero q-value"""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def compress(content, encoding):
+    """Compress bytes with 'br' or 'gzip' at the configured levels"""
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding we support for an Accept-Encoding header, or None"""
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression of API responses.
+
+    Only JSON under /api/ is compressed: those bodies carry no CSRF tokens
+    or other secrets next to reflected input, which is what a BREACH-style
+    length attack needs. Admin HTML, CSV downloads, responses under
+    COMPRESSION_MIN_BYTES, streaming responses (e.g. WhiteNoise static
+    files) and already-encoded responses pass through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not request.path_info.startswith(API_PREFIX):
+            return response
+        if response.get('Content-Type', '').split(';')[0].strip() != 'application/json':
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # Strong ETags no longer match the encoded body
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Per-class adaptive concurrency limits for chatbot routes (see admission.py).
+
+    Sits after CorsMiddleware so shed responses still carry CORS headers and
+    the frontend can read the 503 and its Retry-After.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.controller = controller
+
+    def __call__(self, request):
+        if not settings.ADMISSION_CONTROL:
+            return self.get_response(request)
+
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return self.get_response(request)
+
+        if match.func.__module__ != 'chatbot.views':
+            return self.get_response(request)
+
+        limit = self.controller.classify(match.url_name)
+        if limit is None:
+            return self.get_response(request)
+
+        if not self.controller.acquire(limit):
+            retry_after = limit.retry_after()
+            print(f"🚦 Shed {request.method} {request.path_info} ({limit.name}), retry in {retry_after}s")
+            response = JsonResponse(
+                {
+                    'error': 'Server is busy, please retry shortly',
+                    'class': limit.name,
+                    'retryAfter': retry_after,
+                },
+                status=503
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        started = time.monotonic()
+        ok = False
+        try:
+            response = self.get_response(request)
+            ok = response.status_code < 500
+            return response
+        finally:
+            self.controller.release(limit, time.monotonic() - started, ok=ok)
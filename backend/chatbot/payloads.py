@@ -0,0 +1,279 @@
+"""
+Pre-rendered analyze payloads
+The whole-history `analyze` response for an area depends only on the
+dataset, apart from the echoed query. With ANALYZE_PRERENDER on, every
+area's response is rendered and encoded once per dataset generation
+(across a process pool) into one contiguous byte store, so the hot path is
+a dict lookup plus splicing the query in - no pandas at request time.
+
+Each entry is stored as the encoded JSON split around the query value:
+
+    {"area":"Wakad",...,"query":  |  ,"recordCount":9,...}
+
+With ANALYZE_PRERENDER_DIR set, the store is written to a file keyed by the
+dataset's source state and memory-mapped, so workers that load the same
+data share one copy through the page cache instead of each building their
+own.
+"""
+
+from django.conf import settings
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import struct
+import sys
+import time
+
+from . import renderers
+from .renderers import dumps
+
+# Bump when the payload layout changes so cached store files are rebuilt
+PAYLOAD_FORMAT = 1
+
+# Modules whose code shapes the stored bytes: loading and merging the frame
+# (datasets), the payload builders (views), the field lists they select from
+# (query_parser) and the encoder (renderers). A change to any of them
+# invalidates mapped store files.
+RENDER_MODULES = ['datasets.py', 'payloads.py', 'views.py', 'query_parser.py', 'renderers.py']
+
+# Below this many areas the store is rendered in-process. Starting a
+# forkserver/spawn pool and running django.setup() in each worker costs ~2s
+# (300 areas: 0.38s in-process vs 2.19s with 2 workers), and the build runs
+# inside registry.get(), so the pool only pays off for catalogues this big
+POOL_MIN_AREAS = 2000
+
+# Stand-in for the query while rendering; the store is split around it
+QUERY_PLACEHOLDER = '\x00query\x00'
+
+_HEADER = struct.Struct('<Q')
+
+
+def _init_worker():
+    """Process-pool initializer: workers render with the views' helpers"""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_api.settings')
+    django.setup()
+
+
+def render_areas(dataset_id, frame):
+    """
+    Render the analyze payload for every area in frame.
+
+    Returns:
+        list of (area key, area name, bytes before the query, bytes after it)
+    """
+    from .views import build_analyze_payload
+
+    placeholder = dumps(QUERY_PLACEHOLDER)
+    frame = frame.sort_values(['area', 'year'], kind='stable')
+    keys = frame['area'].str.lower()
+
+    rendered = []
+    for key, area_df in frame.groupby(keys, sort=False):
+        # Same display name the query parser picks (first spelling seen)
+        name = str(area_df['area'].iloc[0])
+        body = dumps(build_analyze_payload(dataset_id, name, area_df, QUERY_PLACEHOLDER))
+        split = body.index(placeholder)
+        rendered.append((key, name, body[:split], body[split + len(placeholder):]))
+    return rendered
+
+
+def _chunks(df, count):
+    """Split df into about count frames without splitting an area"""
+    keys = df['area'].str.lower()
+    areas = keys.unique()
+    size = max(1, -(-len(areas) // count))
+    for start in range(0, len(areas), size):
+        yield df[keys.isin(areas[start:start + size])]
+
+
+def render_all(dataset_id, df, workers):
+    """Render every area's payload, in a process pool when workers > 1"""
+    if workers <= 1:
+        return render_areas(dataset_id, df)
+
+    # Never fork a threaded server process; forkserver/spawn start clean
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+    rendered = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(render_areas, dataset_id, chunk) for chunk in _chunks(df, workers * 4)
+        ]
+        for future in futures:
+            rendered.extend(future.result())
+    return rendered
+
+
+class PayloadStore:
+    """Area -> (offset, split, end) into one contiguous buffer of encoded payloads"""
+
+    def __init__(self, buffer, index, build_seconds=0.0, workers=1, path=None):
+        self.buffer = buffer
+        self._view = memoryview(buffer)
+        self.index = index
+        self.build_seconds = build_seconds
+        self.workers = workers
+        self.path = path
+        self.hits = 0
+
+    @classmethod
+    def from_rendered(cls, rendered, **kwargs):
+        parts = []
+        index = {}
+        offset = 0
+        for key, name, before, after in rendered:
+            parts.append(before)
+            parts.append(after)
+            index[key] = (name, offset, offset + len(before), offset + len(before) + len(after))
+            offset += len(before) + len(after)
+        return cls(b''.join(parts), index, **kwargs)
+
+    def entries(self):
+        """(key, name, before, after) for every stored area"""
+        for key, (name, offset, split, end) in self.index.items():
+            yield key, name, bytes(self._view[offset:split]), bytes(self._view[split:end])
+
+    def render(self, area, query):
+        """
+        Encoded analyze response for area with query spliced in.
+
+        Returns:
+            bytes, or None if area isn't stored under this exact name
+        """
+        entry = self.index.get(area.lower())
+        if entry is None or entry[0] != area:
+            return None
+        _, offset, split, end = entry
+        self.hits += 1
+        return b''.join((self._view[offset:split], dumps(query), self._view[split:end]))
+
+    def save(self, path):
+        """Write header + JSON index + buffer atomically to path"""
+        index = json.dumps(self.index, ensure_ascii=False).encode('utf-8')
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(len(index)))
+            f.write(index)
+            f.write(self._view)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Memory-map a store written by save()"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (index_len,) = _HEADER.unpack(mapped[:_HEADER.size])
+        start = _HEADER.size + index_len
+        index = {key: tuple(entry) for key, entry in json.loads(mapped[_HEADER.size:start]).items()}
+        return cls(memoryview(mapped)[start:], index, path=path, **kwargs)
+
+    def index_bytes(self):
+        return sys.getsizeof(self.index) + sum(
+            sys.getsizeof(key) + sys.getsizeof(entry) for key, entry in self.index.items()
+        )
+
+    def memory_bytes(self):
+        """Payload buffer (mapped or in memory) plus the index, for the dataset memory budget"""
+        return len(self._view) + self.index_bytes()
+
+    def stats(self):
+        return {
+            'areas': len(self.index),
+            'bytes': len(self._view),
+            'indexBytes': self.index_bytes(),
+            'buildSeconds': round(self.build_seconds, 4),
+            'workers': self.workers,
+            'mmapPath': os.path.basename(self.path) if self.path else None,
+            'hits': self.hits,
+        }
+
+
+def _store_path(dataset):
+    """Store file for the dataset's exact source state, or None if mmap is off"""
+    if not settings.ANALYZE_PRERENDER_DIR:
+        return None
+    encoder = getattr(renderers.orjson, '__version__', 'stdlib json')
+    state = [PAYLOAD_FORMAT, dataset.id, str(dataset.path), dataset.overlay_offset, encoder]
+    # Source data plus the code that renders it
+    here = os.path.dirname(__file__)
+    code = [os.path.join(here, name) for name in RENDER_MODULES]
+    for path in [dataset.path, *code]:
+        stat = os.stat(path)
+        state += [stat.st_mtime_ns, stat.st_size]
+    key = hashlib.sha1(repr(state).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(settings.ANALYZE_PRERENDER_DIR, f'{dataset.id}-{key}.payloads')
+
+
+def _publish(store, dataset):
+    """Save to the mmap directory (dropping this dataset's older stores) and map it"""
+    path = _store_path(dataset)
+    if path is None:
+        return store
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    store.save(path)
+    # Exactly this dataset's stores: "pune-2023-<key>" belongs to dataset pune-2023
+    pattern = re.compile(rf'{re.escape(dataset.id)}-[0-9a-f]{{16}}\.payloads')
+    for name in os.listdir(os.path.dirname(path)):
+        stale = os.path.join(os.path.dirname(path), name)
+        if pattern.fullmatch(name) and stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return PayloadStore.load(path, build_seconds=store.build_seconds, workers=store.workers)
+
+
+def build_payload_store(dataset, workers=None):
+    """
+    Render every area of dataset, reusing a matching mmap'd store if one exists.
+    Without an explicit workers count, catalogues under POOL_MIN_AREAS render
+    in-process.
+    """
+    path = _store_path(dataset)
+    if path is not None and os.path.exists(path):
+        store = PayloadStore.load(path)
+        print(f"✅ Mapped {len(store.index)} pre-rendered payloads for '{dataset.id}' from {os.path.basename(path)}")
+        return store
+
+    if workers is None:
+        workers = settings.ANALYZE_PRERENDER_WORKERS or os.cpu_count() or 1
+        if dataset.df['area'].nunique() < POOL_MIN_AREAS:
+            workers = 1
+    started = time.perf_counter()
+    rendered = render_all(dataset.id, dataset.df, workers)
+    store = PayloadStore.from_rendered(rendered, build_seconds=time.perf_counter() - started, workers=workers)
+    store = _publish(store, dataset)
+
+    stats = store.stats()
+    print(
+        f"✅ Pre-rendered {stats['areas']} analyze payloads for '{dataset.id}' in "
+        f"{stats['buildSeconds']:.2f}s ({stats['bytes'] / 1e6:.1f} MB, {workers} workers)"
+    )
+    return store
+
+
+def update_payload_store(store, dataset, areas):
+    """Store for the next generation: re-render only areas, copy the rest"""
+    started = time.perf_counter()
+    keys = {str(area).lower() for area in areas}
+    frame = dataset.df[dataset.df['area'].str.lower().isin(keys)]
+    fresh = {key: (key, name, before, after) for key, name, before, after in render_areas(dataset.id, frame)}
+
+    rendered = [fresh.pop(key, (key, name, before, after)) for key, name, before, after in store.entries()]
+    rendered.extend(fresh.values())
+    updated = PayloadStore.from_rendered(
+        rendered, build_seconds=time.perf_counter() - started, workers=1,
+    )
+    return _publish(updated, dataset)
+
+
+def get_payload_store(dataset):
+    """PayloadStore for a Dataset, built once per generation"""
+    return dataset.derived('analyze_payloads', build_payload_store, update_payload_store)
@@ -0,0 +1,260 @@
+"""
+Query Parser for Real Estate Chatbot
+Single-pass extraction of areas, year range, metrics and intent from free
+text, plus a year-sorted per-area index for slicing the matching rows
+"""
+
+import numpy as np
+import re
+import sys
+
+TOKEN_RE = re.compile(r"[a-z0-9]+|-")
+YEAR_RE = re.compile(r"^(19|20)\d{2}$")
+SHORT_YEAR_RE = re.compile(r"^\d{2}$")
+
+METRIC_KEYWORDS = {
+    'flat': 'flat', 'flats': 'flat', 'residential': 'flat', 'apartment': 'flat',
+    'apartments': 'flat', 'home': 'flat', 'homes': 'flat', 'housing': 'flat',
+    'office': 'office', 'offices': 'office', 'commercial': 'office',
+    'shop': 'shop', 'shops': 'shop', 'retail': 'shop',
+    'sales': 'sales', 'sale': 'sales', 'revenue': 'sales', 'turnover': 'sales',
+    'units': 'units', 'unit': 'units', 'sold': 'units', 'volume': 'units',
+    'demand': 'units', 'transactions': 'units',
+}
+
+INTENT_KEYWORDS = {
+    'compare': 'compare', 'comparison': 'compare', 'vs': 'compare', 'versus': 'compare',
+    'export': 'export', 'download': 'export', 'csv': 'export',
+}
+
+RANGE_JOINERS = {'-', 'to', 'through', 'till', 'until'}
+
+# Chart/table fields carrying each metric
+CHART_FIELDS = {
+    'flat': 'flatRate',
+    'office': 'officeRate',
+    'shop': 'shopRate',
+    'sales': 'totalSales',
+    'units': 'totalSold',
+}
+
+TABLE_FIELDS = {
+    'flat': 'Flat Rate (₹/sqft)',
+    'office': 'Office Rate (₹/sqft)',
+    'shop': 'Shop Rate (₹/sqft)',
+    'sales': 'Total Sales (₹ Cr)',
+    'units': 'Units Sold',
+}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def range_end(tokens, i, start, joiners=RANGE_JOINERS):
+    """
+    End year of a range whose joiner is at tokens[i] ("to 2022", "-22").
+
+    Returns:
+        (end year, tokens consumed) or (None, 0)
+    """
+    if i + 1 >= len(tokens) or tokens[i] not in joiners:
+        return None, 0
+    value = tokens[i + 1]
+    if YEAR_RE.match(value):
+        return int(value), 2
+    if SHORT_YEAR_RE.match(value):
+        # "2021-22": same century as the start, rolling over if it wraps
+        end = start // 100 * 100 + int(value)
+        return (end if end >= start else end + 100), 2
+    return None, 0
+
+
+class ParsedQuery:
+    """Structured result of parsing one query"""
+
+    def __init__(self, query, areas, start_year, end_year, metrics, intent):
+        self.query = query
+        self.areas = areas
+        self.start_year = start_year
+        self.end_year = end_year
+        self.metrics = metrics
+        self.intent = intent
+
+    @property
+    def area(self):
+        return self.areas[0] if self.areas else None
+
+    def to_dict(self):
+        return {
+            'areas': self.areas,
+            'startYear': self.start_year,
+            'endYear': self.end_year,
+            'metrics': self.metrics,
+            'intent': self.intent,
+        }
+
+
+class QueryParser:
+    """Parses queries against one dataset's area vocabulary"""
+
+    def __init__(self, areas, years):
+        # Area names keyed by their token tuple, matched longest-first
+        self.vocabulary = {}
+        for area in areas:
+            tokens = tuple(tokenize(str(area)))
+            if tokens:
+                self.vocabulary.setdefault(tokens, str(area))
+        self.max_area_tokens = max((len(t) for t in self.vocabulary), default=0)
+        self.latest_year = int(max(years)) if len(years) else None
+
+    def updated(self, areas, years):
+        """Copy of the parser that also knows the given areas and years"""
+        parser = QueryParser([], [])
+        parser.vocabulary = dict(self.vocabulary)
+        for area in areas:
+            tokens = tuple(tokenize(str(area)))
+            if tokens:
+                parser.vocabulary.setdefault(tokens, str(area))
+        parser.max_area_tokens = max((len(t) for t in parser.vocabulary), default=0)
+        parser.latest_year = int(max(years)) if len(years) else None
+        return parser
+
+    def memory_bytes(self):
+        """Vocabulary size, for the dataset memory budget"""
+        return sys.getsizeof(self.vocabulary) + sum(
+            sys.getsizeof(tokens) + sum(map(sys.getsizeof, tokens)) + sys.getsizeof(name)
+            for tokens, name in self.vocabulary.items()
+        )
+
+    def parse(self, query):
+        tokens = tokenize(query)
+        areas, years, metrics = [], [], []
+        start_year = end_year = None
+        intent = 'analyze'
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            # Areas: longest token n-gram in the vocabulary
+            matched = None
+            for size in range(min(self.max_area_tokens, len(tokens) - i), 0, -1):
+                area = self.vocabulary.get(tuple(tokens[i:i + size]))
+                if area is not None:
+                    matched = (area, size)
+                    break
+            if matched:
+                if matched[0] not in areas:
+                    areas.append(matched[0])
+                i += matched[1]
+                continue
+
+            nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+            if YEAR_RE.match(token):
+                end, used = range_end(tokens, i + 1, int(token))
+                if end is not None:
+                    start_year, end_year = sorted((int(token), end))
+                    i += 1 + used
+                    continue
+                years.append(int(token))
+            elif nxt and YEAR_RE.match(nxt) and token in ('from', 'since', 'between', 'after', 'before', 'until', 'till'):
+                year = int(nxt)
+                if token in ('from', 'since', 'between'):
+                    # "from 2020 to 2022", "between 2020 and 2022"
+                    joiners = {'and'} if token == 'between' else RANGE_JOINERS
+                    end, used = range_end(tokens, i + 2, year, joiners)
+                    if end is not None:
+                        start_year, end_year = sorted((year, end))
+                        i += 2 + used
+                        continue
+                    start_year = year
+                elif token == 'after':
+                    start_year = year + 1
+                elif token == 'before':
+                    end_year = year - 1
+                else:
+                    end_year = year
+                i += 2
+                continue
+            elif token in ('last', 'past') and nxt and nxt.isdigit() and i + 2 < len(tokens) \
+                    and tokens[i + 2] in ('year', 'years') and self.latest_year is not None:
+                start_year = self.latest_year - int(nxt) + 1
+                i += 3
+                continue
+            elif token in METRIC_KEYWORDS:
+                metric = METRIC_KEYWORDS[token]
+                if metric not in metrics:
+                    metrics.append(metric)
+            elif token in INTENT_KEYWORDS:
+                intent = INTENT_KEYWORDS[token]
+            i += 1
+
+        # Stray years fill whichever end of the range is still open
+        if years and start_year is None and end_year is None:
+            start_year, end_year = min(years), max(years)
+        elif years and end_year is None and max(years) >= start_year:
+            end_year = max(years)
+        elif years and start_year is None and min(years) <= end_year:
+            start_year = min(years)
+        if intent == 'analyze' and len(areas) > 1 and 'and' in tokens:
+            intent = 'compare'
+
+        return ParsedQuery(query, areas, start_year, end_year, metrics, intent)
+
+
+class AreaYearIndex:
+    """Each area's rows sorted by year, sliced by binary search on the year array"""
+
+    def __init__(self, df, frames=None, frame_bytes=0):
+        self._frames = dict(frames) if frames is not None else {}
+        # Slices are views of the sorted frames they were cut from, which stay
+        # alive with them, so those frames are sized once here
+        self._frame_bytes = frame_bytes
+        if df.empty:
+            return
+        frame = df.sort_values(['area', 'year'], kind='stable')
+        self._frame_bytes += int(frame.memory_usage(deep=False).sum())
+        keys = frame['area'].str.lower().to_numpy()
+        bounds = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            part = frame.iloc[lo:hi]
+            self._frames[keys[lo]] = (part['year'].to_numpy(), part)
+
+    def updated(self, df, areas):
+        """Copy of the index with only the given areas re-sliced from df"""
+        return AreaYearIndex(df[df['area'].isin(areas)], frames=self._frames, frame_bytes=self._frame_bytes)
+
+    def memory_bytes(self):
+        """Sorted frames plus per-area year arrays, for the dataset memory budget"""
+        return self._frame_bytes + sys.getsizeof(self._frames) + sum(
+            years.nbytes for years, _ in self._frames.values()
+        )
+
+    def slice(self, area, start_year=None, end_year=None):
+        """Rows for area within [start_year, end_year], sorted by year (None if unknown)"""
+        entry = self._frames.get(area.lower())
+        if entry is None:
+            return None
+        years, frame = entry
+        lo = 0 if start_year is None else int(np.searchsorted(years, start_year, side='left'))
+        hi = len(years) if end_year is None else int(np.searchsorted(years, end_year, side='right'))
+        return frame.iloc[lo:hi]
+
+
+def get_query_parser(dataset):
+    """QueryParser for a Dataset, built once per generation"""
+    return dataset.derived(
+        'query_parser',
+        lambda d: QueryParser(d.df['area'].unique(), d.df['year'].unique()),
+        lambda parser, d, areas: parser.updated(areas, d.df['year'].unique()),
+    )
+
+
+def get_area_index(dataset):
+    """AreaYearIndex for a Dataset, built once per generation"""
+    return dataset.derived(
+        'area_index',
+        lambda d: AreaYearIndex(d.df),
+        lambda index, d, areas: index.updated(d.df, areas),
+    )
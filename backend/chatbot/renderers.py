@@ -0,0 +1,91 @@
+"""
+Fast JSON Rendering for Real Estate Chatbot API
+Serialises NumPy scalars and arrays natively, so views can return
+pandas/NumPy values without casting them by hand
+"""
+
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+import datetime
+import decimal
+import json
+import math
+import uuid
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(obj):
+    """
+    Types neither encoder handles natively, as DRF's JSONEncoder renders
+    them (NumPy is duck-typed, never imported)
+    """
+    if isinstance(obj, Promise):
+        # Lazy translations, e.g. gettext_lazy messages
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.datetime, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _nan_to_none(obj):
+    """NaN/inf are not valid JSON; match orjson and emit null"""
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        return {k: _nan_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_nan_to_none(v) for v in obj]
+    return obj
+
+
+def dumps(data, indent=False):
+    """Encode data to JSON bytes, NumPy-aware"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+
+    def default(obj):
+        return _nan_to_none(_default(obj))
+
+    return json.dumps(
+        _nan_to_none(data), default=default, ensure_ascii=False,
+        indent=2 if indent else None, separators=None if indent else (',', ':'),
+    ).encode('utf-8')
+
+
+class FastJSONRenderer(BaseRenderer):
+    """Drop-in replacement for rest_framework.renderers.JSONRenderer"""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = False
+        if accepted_media_type:
+            params = dict(
+                part.strip().split('=', 1) for part in accepted_media_type.split(';')[1:] if '=' in part
+            )
+            indent = params.get('indent', '').strip() not in ('', '0')
+        return dumps(data, indent=indent)
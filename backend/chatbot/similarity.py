@@ -0,0 +1,255 @@
+"""
+Similar Localities for Real Estate Chatbot
+Normalised per-area feature vectors and a precomputed nearest-neighbour
+table, rebuilt once per dataset generation
+"""
+
+import numpy as np
+import warnings
+
+from .analytics import get_market_analytics
+
+# Neighbours kept per area at build time; larger k falls back to one row scan
+PRECOMPUTED_NEIGHBOURS = 50
+
+# Largest scaler drift an update may carry before the scaler is refitted
+# and the whole table rebuilt; below it the pinned scaler is kept and only
+# the uploaded areas are patched. Drift is the largest per-feature relative
+# std change (which stretches distances along that feature) or mean shift in
+# std units (which only moves where missing values are imputed)
+SCALER_DRIFT = 0.1
+
+# Rows processed per block when building the table, bounds peak memory
+BLOCK_SIZE = 1024
+
+FEATURES = [
+    'flat_level',      # log mean flat rate
+    'flat_latest',     # log latest flat rate
+    'office_level',    # log mean office rate
+    'shop_level',      # log mean shop rate
+    'flat_cagr',
+    'yoy_growth',
+    'sales_level',     # log mean sales value
+    'units_level',     # log mean units sold
+    'sales_trend',
+    'units_trend',
+]
+
+
+def _row_mean(matrix):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(matrix, axis=1)
+
+
+def _row_latest(matrix):
+    valid = ~np.isnan(matrix)
+    last_idx = matrix.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    return np.where(valid.any(axis=1), matrix[np.arange(matrix.shape[0]), last_idx], np.nan)
+
+
+def raw_features(analytics, rows=None):
+    """Unscaled feature vectors for all areas (or just the given rows)"""
+    rows = slice(None) if rows is None else rows
+    series = {name: matrix[rows] for name, matrix in analytics.series.items()}
+    metrics = {name: values[rows] for name, values in analytics.metrics().items()}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = [
+            np.log1p(_row_mean(series['flat'])),
+            np.log1p(_row_latest(series['flat'])),
+            np.log1p(_row_mean(series['office'])),
+            np.log1p(_row_mean(series['shop'])),
+            metrics['flat_cagr'],
+            metrics['yoy_growth'],
+            np.log1p(_row_mean(series['sales'])),
+            np.log1p(_row_mean(series['units'])),
+            metrics['sales_trend'],
+            metrics['units_trend'],
+        ]
+    features = np.column_stack(columns).astype(np.float64)
+    features[~np.isfinite(features)] = np.nan
+    return features
+
+
+def fit_scaler(features):
+    """Per-column mean and std, ignoring missing values"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(features, axis=0)
+        std = np.nanstd(features, axis=0)
+    mean = np.nan_to_num(mean)
+    std = np.where(np.nan_to_num(std) > 0, std, 1.0)
+    return mean, std
+
+
+def scale_features(features, mean, std):
+    """
+    Z-score features; missing values become the column mean (0 after
+    scaling) so they neither attract nor repel neighbours.
+    """
+    return np.nan_to_num((features - mean) / std).astype(np.float32)
+
+
+def scaler_drift(scaler, pinned):
+    """Largest per-feature move of scaler away from pinned, in pinned std units"""
+    mean, std = scaler
+    pinned_mean, pinned_std = pinned
+    return float(max(np.max(np.abs(mean - pinned_mean) / pinned_std), np.max(np.abs(std / pinned_std - 1))))
+
+
+def build_feature_matrix(analytics):
+    """
+    Turn each area's time series into a normalised feature vector.
+
+    Returns:
+        float32 array of shape (areas, len(FEATURES))
+    """
+    features = raw_features(analytics)
+    return scale_features(features, *fit_scaler(features))
+
+
+class SimilarityIndex:
+    """Top neighbours of every area by Euclidean distance in feature space"""
+
+    def __init__(self, areas, features, neighbours=PRECOMPUTED_NEIGHBOURS, scaler=None, table=None):
+        self.areas = areas
+        self.features = features
+        self.scaler = scaler
+        self._lookup = {str(area).lower(): i for i, area in enumerate(areas)}
+        self._sq_norms = np.einsum('ij,ij->i', features, features)
+        self.neighbours = min(neighbours, max(len(areas) - 1, 0))
+        self.indices, self.distances = table if table is not None else self._build()
+
+    @classmethod
+    def from_analytics(cls, analytics, scaler=None):
+        """Full build, fitting the scaler unless one is given"""
+        features = raw_features(analytics)
+        scaler = scaler or fit_scaler(features)
+        return cls(analytics.areas, scale_features(features, *scaler), scaler=scaler)
+
+    def _distances(self, rows):
+        """Squared distances from a block of rows to every area"""
+        block = self.features[rows]
+        dist = self._sq_norms[rows, None] + self._sq_norms[None, :] - 2.0 * block @ self.features.T
+        np.maximum(dist, 0, out=dist)
+        dist[np.arange(len(block)), rows] = np.inf  # never your own neighbour
+        return dist
+
+    def _top(self, dist, candidates=None):
+        """Nearest k of each row of dist as (indices, distances), closest first"""
+        k = self.neighbours
+        part = np.argpartition(dist, k - 1, axis=1)[:, :k] if k < dist.shape[1] else np.argsort(dist, axis=1)[:, :k]
+        part_dist = np.take_along_axis(dist, part, axis=1)
+        order = np.argsort(part_dist, axis=1, kind='stable')
+        part = np.take_along_axis(part, order, axis=1)
+        part_dist = np.take_along_axis(part_dist, order, axis=1)
+        if candidates is not None:
+            part = np.take_along_axis(candidates, part, axis=1)
+        return part, part_dist
+
+    def _scan(self, rows, indices, distances):
+        """Recompute the neighbour lists of rows against every area"""
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start:start + BLOCK_SIZE]
+            top, top_dist = self._top(self._distances(block))
+            indices[block] = top
+            distances[block] = np.sqrt(top_dist)
+
+    def _build(self):
+        n, k = len(self.areas), self.neighbours
+        indices = np.empty((n, k), dtype=np.int32)
+        distances = np.empty((n, k), dtype=np.float32)
+        if k > 0:
+            self._scan(np.arange(n), indices, distances)
+        return indices, distances
+
+    def updated(self, analytics, areas):
+        """
+        Index for the next generation, identical to a full build with the
+        same scaler.
+
+        The scaler is pinned at the last full build. It is refitted on
+        every area's features, and only when it drifts past SCALER_DRIFT
+        are all vectors rescaled and the table rebuilt. Otherwise only the
+        given areas' vectors change: other areas' lists are patched with
+        distances to them, falling back to a full row scan only when a
+        list may be missing an unseen neighbour.
+        """
+        if not np.array_equal(analytics.areas, self.areas) or self.scaler is None:
+            return SimilarityIndex.from_analytics(analytics)
+
+        raw = raw_features(analytics)
+        scaler = fit_scaler(raw)
+        if scaler_drift(scaler, self.scaler) > SCALER_DRIFT:
+            return SimilarityIndex(analytics.areas, scale_features(raw, *scaler), self.neighbours, scaler)
+
+        rows = np.searchsorted(self.areas, np.asarray(areas, dtype=object))
+        features = self.features.copy()
+        features[rows] = scale_features(raw[rows], *self.scaler)
+        index = SimilarityIndex(self.areas, features, self.neighbours, self.scaler,
+                                table=(self.indices.copy(), self.distances.copy()))
+        if index.neighbours == 0:
+            return index
+
+        changed = np.zeros(len(self.areas), dtype=bool)
+        changed[rows] = True
+        index._scan(rows, index.indices, index.distances)
+
+        others = np.flatnonzero(~changed)
+        rescan = []
+        for start in range(0, len(others), BLOCK_SIZE):
+            block = others[start:start + BLOCK_SIZE]
+            old_idx = self.indices[block]
+            old_dist = self.distances[block].astype(np.float64) ** 2
+            bound = old_dist[:, -1].copy()
+            stale = changed[old_idx]
+            old_dist[stale] = np.inf
+
+            new_dist = (index._sq_norms[block, None] + index._sq_norms[None, rows]
+                        - 2.0 * features[block] @ features[rows].T)
+            np.maximum(new_dist, 0, out=new_dist)
+
+            candidates = np.hstack([old_idx, np.broadcast_to(rows, (len(block), len(rows)))])
+            top, top_dist = index._top(np.hstack([old_dist, new_dist]), candidates)
+            index.indices[block] = top
+            index.distances[block] = np.sqrt(top_dist)
+
+            # Lists that lost a member and now reach past the old k-th distance
+            # may be skipping an area that was never stored
+            rescan.append(block[stale.any(axis=1) & (top_dist[:, -1] > bound)])
+
+        rescan = np.concatenate(rescan) if rescan else np.empty(0, dtype=int)
+        if len(rescan):
+            index._scan(rescan, index.indices, index.distances)
+        return index
+
+    def find(self, name):
+        """Row index for an area name (case-insensitive) or None"""
+        return self._lookup.get(name.strip().lower())
+
+    def similar(self, row, k=5):
+        """Top-k (area, score) neighbours; score is 1 / (1 + distance)"""
+        k = max(0, min(k, len(self.areas) - 1))
+        if k <= self.neighbours:
+            indices, distances = self.indices[row, :k], self.distances[row, :k]
+        else:
+            dist = self._distances(np.array([row]))[0]
+            indices = np.argsort(dist, kind='stable')[:k]
+            distances = np.sqrt(dist[indices])
+        return [
+            {
+                'area': str(self.areas[i]),
+                'score': round(float(1.0 / (1.0 + d)), 4),
+                'distance': round(float(d), 4),
+            }
+            for i, d in zip(indices, distances)
+        ]
+
+
+def get_similarity_index(dataset):
+    """SimilarityIndex for a Dataset, built once per generation"""
+    return dataset.derived(
+        'similarity',
+        lambda d: SimilarityIndex.from_analytics(get_market_analytics(d)),
+        lambda index, d, areas: index.updated(get_market_analytics(d), areas),
+    )
@@ -0,0 +1,498 @@
+"""
+Tests for Real Estate Chatbot API
+
+    python manage.py test chatbot
+"""
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from unittest import mock
+
+import json
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from . import renderers
+from .admission import AdaptiveLimit, AdmissionController
+from .analytics import MarketAnalytics
+from .datasets import Dataset, DatasetRegistry, OVERLAY_COLUMNS, append_overlay, merge_rows, read_overlay
+from .forecasting import BatchForecaster, fit_holt, fit_linear
+from .ingest import UploadError, read_upload
+from .management.commands.bench_forecast import reference_holt, reference_linear, synthetic_series
+from .management.commands.importtime import FORBIDDEN, SCENARIOS, run_scenario
+from .middleware import AdmissionControlMiddleware, CompressionMiddleware
+from .payloads import PayloadStore, _publish
+from .query_parser import QueryParser, get_area_index
+from .renderers import FastJSONRenderer
+from .similarity import SimilarityIndex, get_similarity_index
+
+
+def synthetic_frame(areas=800, years=range(2020, 2025), seed=0):
+    """Normalised area-year rows shaped like the source workbook"""
+    rng = np.random.default_rng(seed)
+    names = [f'Area {i:04d}' for i in range(areas)]
+    base = rng.uniform(4000, 15000, size=areas)
+    growth = rng.normal(0.06, 0.03, size=areas)
+    rows = []
+    for i, name in enumerate(names):
+        for step, year in enumerate(years):
+            rate = base[i] * (1 + growth[i]) ** step
+            rows.append({
+                'area': name, 'year': year,
+                'flat_avg_rate': rate, 'office_avg_rate': rate * 1.3, 'shop_avg_rate': rate * 1.8,
+                'total_sales': rate * rng.uniform(800, 1200), 'total_sold': float(rng.integers(100, 2000)),
+                'total_carpet_area': rng.uniform(1e5, 1e6),
+            })
+    return pd.DataFrame(rows)
+
+
+class LightImportPathTests(SimpleTestCase):
+    """URL resolution and health checks must not pay for pandas/NumPy/Groq"""
+
+    def assert_light(self, scenario):
+        _, heavy = run_scenario(SCENARIOS[scenario][1])
+        leaked = [module for module in FORBIDDEN if module in heavy]
+        self.assertEqual(leaked, [], f'{scenario} imported {", ".join(leaked)}')
+
+    def test_url_resolution_is_light(self):
+        self.assert_light('urls')
+
+    def test_health_endpoints_are_light(self):
+        self.assert_light('health')
+
+
+class SimilarityUpdateTests(SimpleTestCase):
+    """An uploaded update must match a full build with the same scaler"""
+
+    def update(self, df, rows):
+        before = Dataset('test', 'test.xlsx', df, generation=1)
+        previous = get_similarity_index(before)
+
+        after = Dataset('test', 'test.xlsx', merge_rows(df, rows), generation=2)
+        after.inherit(before, sorted(rows['area'].unique()))
+        updated = get_similarity_index(after)
+        full = SimilarityIndex.from_analytics(MarketAnalytics(after.df), scaler=updated.scaler)
+
+        np.testing.assert_array_equal(updated.indices, full.indices)
+        np.testing.assert_allclose(updated.distances, full.distances, rtol=1e-5)
+        return previous, updated, after
+
+    def latest_rows(self, df, areas):
+        latest = df[df['year'] == df['year'].max()]
+        return latest[latest['area'].isin(areas)][OVERLAY_COLUMNS].copy()
+
+    def test_small_edit_patches_with_pinned_scaler(self):
+        df = synthetic_frame()
+        rows = self.latest_rows(df, df['area'].unique()[:1])
+        rows['flat_avg_rate'] *= 1.000001
+        previous, updated, _ = self.update(df, rows)
+        self.assertIs(updated.scaler, previous.scaler)
+
+    def test_revised_rows_upload(self):
+        df = synthetic_frame()
+        rows = self.latest_rows(df, df['area'].unique()[::16])
+        rows['flat_avg_rate'] *= 1.03
+        previous, updated, _ = self.update(df, rows)
+        self.assertIs(updated.scaler, previous.scaler)
+
+    def test_new_year_upload(self):
+        df = synthetic_frame()
+        rows = self.latest_rows(df, df['area'].unique()[:200])
+        rows['year'] += 1
+        for column in ('flat_avg_rate', 'office_avg_rate', 'shop_avg_rate', 'total_sales'):
+            rows[column] *= 1.06
+        self.update(df, rows)
+
+    def test_drifted_scaler_rebuilds_like_a_fresh_load(self):
+        df = synthetic_frame()
+        rows = self.latest_rows(df, df['area'].unique()[:400])
+        rows['flat_avg_rate'] *= 3
+        previous, updated, after = self.update(df, rows)
+        self.assertIsNot(updated.scaler, previous.scaler)
+        fresh = SimilarityIndex.from_analytics(MarketAnalytics(after.df))
+        np.testing.assert_array_equal(updated.indices, fresh.indices)
+
+
+class IncrementalUpdateTests(SimpleTestCase):
+    """Analytics and forecasts carried into a new generation match a fresh build"""
+
+    def assert_update_matches_fresh(self, df, rows):
+        analytics = MarketAnalytics(df)
+        analytics.metrics()
+        analytics.metrics(2021, 2023)
+        forecaster = BatchForecaster(analytics)
+        forecaster.forecasts(1)
+
+        merged = merge_rows(df, rows)
+        areas = sorted(rows['area'].unique())
+        updated = analytics.updated(merged, areas)
+        fresh = MarketAnalytics(merged)
+
+        np.testing.assert_array_equal(updated.years, fresh.years)
+        for name, matrix in fresh.series.items():
+            np.testing.assert_array_equal(updated.series[name], matrix)
+        for start, end in ((None, None), (2021, 2023), (2022, None)):
+            for name, values in fresh.metrics(start, end).items():
+                np.testing.assert_allclose(updated.metrics(start, end)[name], values, rtol=1e-9)
+
+        updated_forecasts = forecaster.updated(updated, areas)
+        fresh_forecasts = BatchForecaster(fresh)
+        for horizon in (1, 3):
+            for name, models in fresh_forecasts.forecasts(horizon).items():
+                for model, values in models.items():
+                    for key, array in values.items():
+                        np.testing.assert_allclose(
+                            updated_forecasts.forecasts(horizon)[name][model][key], array, rtol=1e-9,
+                            err_msg=f'{name} {model} {key} horizon {horizon}',
+                        )
+
+    def rows_for(self, df, areas, year):
+        latest = df[df['year'] == df['year'].max()]
+        rows = latest[latest['area'].isin(areas)][OVERLAY_COLUMNS].copy()
+        rows['year'] = year
+        rows['flat_avg_rate'] *= 1.06
+        return rows
+
+    def test_new_year(self):
+        df = synthetic_frame(300)
+        self.assert_update_matches_fresh(df, self.rows_for(df, df['area'].unique()[:40], 2025))
+
+    def test_new_year_after_a_gap(self):
+        df = synthetic_frame(300)
+        self.assert_update_matches_fresh(df, self.rows_for(df, df['area'].unique()[:40], 2027))
+
+    def test_new_year_inside_the_range(self):
+        df = synthetic_frame(300, years=[2018, 2020, 2021, 2022])
+        self.assert_update_matches_fresh(df, self.rows_for(df, df['area'].unique()[:40], 2019))
+
+    def test_revised_rows(self):
+        df = synthetic_frame(300)
+        self.assert_update_matches_fresh(df, self.rows_for(df, df['area'].unique()[::7], 2024))
+
+
+class MemoryBudgetTests(SimpleTestCase):
+    """Derived values count towards the memory budget, not just the frames"""
+
+    def test_building_derived_values_evicts_over_budget(self):
+        frame_bytes = Dataset('a', 'a.xlsx', synthetic_frame(200), generation=0).memory_bytes
+        registry = DatasetRegistry(
+            {'a': 'a.xlsx', 'b': 'b.xlsx'}, memory_budget_bytes=int(frame_bytes * 2.5),
+            loader=lambda path: synthetic_frame(200),
+        )
+        registry.get('a')
+        b = registry.get('b')
+        self.assertIsNotNone(registry.peek('a'))
+
+        get_area_index(b)
+        get_similarity_index(b)
+        self.assertIsNone(registry.peek('a'))
+
+        stats = {d['id']: d for d in registry.stats()['datasets']}
+        self.assertGreater(stats['b']['memoryBytes'], b.memory_bytes)
+        self.assertEqual(set(stats['b']['derivedBytes']), {'area_index', 'analytics', 'similarity'})
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Only /api/ JSON is compressed; admin HTML (CSRF tokens) never is"""
+
+    def compressed(self, path, content_type):
+        body = b'{"value": "' + b'x' * 4096 + b'"}'
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body, content_type=content_type))
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING='gzip')
+        return middleware(request).has_header('Content-Encoding')
+
+    def test_api_json_is_compressed(self):
+        self.assertTrue(self.compressed('/api/pune/areas/', 'application/json'))
+
+    def test_admin_html_is_not_compressed(self):
+        self.assertFalse(self.compressed('/admin/login/', 'text/html; charset=utf-8'))
+        self.assertFalse(self.compressed('/admin/api/', 'application/json'))
+
+    def test_api_csv_is_not_compressed(self):
+        self.assertFalse(self.compressed('/api/pune/download/', 'text/csv'))
+
+
+class QueryParserTests(SimpleTestCase):
+    """Areas, year ranges, metrics and intent pulled out of free text"""
+
+    def setUp(self):
+        self.parser = QueryParser(['Wakad', 'Aundh', 'Baner', 'Pimple Saudagar'], range(2020, 2025))
+
+    def test_year_ranges(self):
+        cases = {
+            'Analyze Wakad': (None, None),
+            'Wakad 2019': (2019, 2019),
+            'Wakad 2020 2023': (2020, 2023),
+            'Wakad 2020-2022': (2020, 2022),
+            'Wakad 2021-22': (2021, 2022),
+            'Wakad 2099-01': (2099, 2101),
+            'Wakad from 2020 to 2022': (2020, 2022),
+            'Wakad 2022 to 2020': (2020, 2022),
+            'Wakad between 2020 and 2022': (2020, 2022),
+            'Wakad since 2021': (2021, None),
+            'Wakad after 2020': (2021, None),
+            'Wakad before 2023': (None, 2022),
+            'Wakad last 3 years': (2022, None),
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                parsed = self.parser.parse(query)
+                self.assertEqual(parsed.areas, ['Wakad'])
+                self.assertEqual((parsed.start_year, parsed.end_year), expected)
+
+    def test_areas_and_intent(self):
+        cases = {
+            'Compare Wakad and Aundh': (['Wakad', 'Aundh'], 'compare'),
+            'Wakad vs Pimple Saudagar': (['Wakad', 'Pimple Saudagar'], 'compare'),
+            'download csv for Baner': (['Baner'], 'export'),
+            'How is baner doing': (['Baner'], 'analyze'),
+        }
+        for query, (areas, intent) in cases.items():
+            with self.subTest(query=query):
+                parsed = self.parser.parse(query)
+                self.assertEqual((parsed.areas, parsed.intent), (areas, intent))
+
+    def test_only_named_metrics(self):
+        self.assertEqual(self.parser.parse('Price trend of Aundh').metrics, [])
+        self.assertEqual(self.parser.parse('office rates in Baner').metrics, ['office'])
+        self.assertEqual(self.parser.parse('Wakad sales and units sold').metrics, ['sales', 'units'])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class AnalyzeEndpointTests(SimpleTestCase):
+    """/api/analyze/ against the bundled dataset"""
+
+    def analyze(self, query, **extra):
+        return self.client.post('/api/analyze/', {'query': query, **extra}, content_type='application/json')
+
+    def test_price_query_keeps_every_chart_field(self):
+        row = self.analyze('Price trend of Aundh').json()['chartData'][0]
+        self.assertTrue({'year', 'flatRate', 'totalSales', 'totalSold'} <= set(row))
+
+    def test_metrics_only_narrows_chart(self):
+        row = self.analyze('Office rates in Aundh', metricsOnly=True).json()['chartData'][0]
+        self.assertEqual(set(row), {'year', 'officeRate'})
+
+    def test_year_range_outside_data_names_the_range(self):
+        response = self.analyze('Wakad 2019')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error'], 'No data for Wakad in 2019')
+
+
+def _append_uploads(path, worker, uploads, rows_per_upload):
+    """Process body for the concurrent overlay test"""
+    for upload in range(uploads):
+        rows = pd.DataFrame({
+            'area': [f'Worker {worker} upload {upload} area {i} ' + 'x' * 200 for i in range(rows_per_upload)],
+            'year': 2024,
+            'flat_avg_rate': 1.0,
+        })
+        append_overlay(path, rows)
+
+
+class UploadTests(SimpleTestCase):
+    """Upload validation and the shared overlay file"""
+
+    def upload(self, text):
+        return read_upload(SimpleUploadedFile('rows.csv', text.encode('utf-8')))
+
+    def test_blank_years_are_rejected(self):
+        with self.assertRaisesMessage(UploadError, 'Missing year in 2 row(s)'):
+            self.upload('final location,year,flat - weighted average rate\nWakad,,9000\nBaner,,8000\n')
+        with self.assertRaisesMessage(UploadError, 'Missing year in 1 row(s)'):
+            self.upload('final location,year,flat - weighted average rate\nWakad,2024,9000\nBaner, ,8000\n')
+
+    def test_header_only_upload_is_rejected(self):
+        with self.assertRaisesMessage(UploadError, 'No data rows found'):
+            self.upload('final location,year,flat - weighted average rate\n')
+
+    def test_concurrent_appends_never_interleave(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('needs fork')
+        workers, uploads, rows_per_upload = 4, 5, 1000
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.xlsx')
+            context = multiprocessing.get_context('fork')
+            processes = [
+                context.Process(target=_append_uploads, args=(path, worker, uploads, rows_per_upload))
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+            rows, _ = read_overlay(path)
+        self.assertEqual(len(rows), workers * uploads * rows_per_upload)
+        self.assertTrue((rows['year'] == 2024).all())
+        # Each upload's rows sit together in the file
+        batches = rows['area'].str.extract(r'^(Worker \d+ upload \d+) ')[0]
+        self.assertEqual(int((batches != batches.shift()).sum()), workers * uploads)
+
+
+class RendererTests(SimpleTestCase):
+    """FastJSONRenderer renders what DRF's JSONRenderer does"""
+
+    def test_lazy_strings(self):
+        data = {'error': gettext_lazy('This field is required.'), 'values': np.arange(2)}
+        expected = {'error': 'This field is required.', 'values': [0, 1]}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), expected)
+        # Same through the stdlib fallback
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(json.loads(FastJSONRenderer().render(data)), expected)
+
+
+class PayloadStoreTests(SimpleTestCase):
+    """Pre-rendered store files in ANALYZE_PRERENDER_DIR"""
+
+    def test_publish_only_replaces_its_own_dataset(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'pune.xlsx')
+            open(source, 'wb').close()
+            others = ['pune-2023-0123456789abcdef.payloads', 'pune-notes.payloads']
+            for name in others + ['pune-fedcba9876543210.payloads']:
+                open(os.path.join(directory, name), 'wb').close()
+
+            dataset = Dataset('pune', source, synthetic_frame(2), generation=1)
+            store = PayloadStore.from_rendered([('area 0000', 'Area 0000', b'{"query":', b'}')])
+            with override_settings(ANALYZE_PRERENDER_DIR=directory):
+                published = _publish(store, dataset)
+
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                sorted(others + ['pune.xlsx', os.path.basename(published.path)]),
+            )
+            self.assertEqual(published.render('Area 0000', 'q'), b'{"query":"q"}')
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to (or by step per read)"""
+
+    def __init__(self, step=0.0):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class AdmissionTests(SimpleTestCase):
+    """AIMD limits, queueing and shedding in admission.py"""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        clock = FakeClock()
+        limit = AdaptiveLimit('test', limit=4, max_limit=5, target_latency=1.0, clock=clock)
+
+        self.assertTrue(limit.acquire())
+        limit.release(0.1)
+        self.assertAlmostEqual(limit.limit, 4.25)
+
+        # Slow responses cut once per latency window
+        for _ in range(3):
+            limit.acquire()
+            limit.release(3.0)
+        self.assertAlmostEqual(limit.limit, 4.25 * 0.9)
+        self.assertEqual(limit.metrics['decreases'], 1)
+
+        clock.now += 10
+        limit.acquire()
+        limit.release(0.1, ok=False)
+        self.assertAlmostEqual(limit.limit, 4.25 * 0.9 * 0.9)
+
+        # Bounded by min_limit and max_limit
+        for _ in range(100):
+            limit.acquire()
+            limit.release(0.01)
+        self.assertEqual(limit.limit, 5)
+        self.assertEqual(AdaptiveLimit('test', limit=12, max_limit=4).limit, 4)
+
+    def test_rejects_when_full(self):
+        limit = AdaptiveLimit('test', limit=1, queue=0, clock=FakeClock())
+        self.assertTrue(limit.acquire())
+        self.assertFalse(limit.acquire())
+        self.assertEqual(limit.metrics['rejected'], 1)
+
+        # Queued requests give up once queue_timeout passes without a slot
+        limit = AdaptiveLimit('test', limit=1, queue=1, queue_timeout=0.5, clock=FakeClock(step=1.0))
+        self.assertTrue(limit.acquire())
+        self.assertFalse(limit.acquire())
+        self.assertEqual(limit.metrics['timedOut'], 1)
+        self.assertEqual(limit.waiting, 0)
+
+    def test_sheds_and_backs_off_behind_higher_priority(self):
+        controller = AdmissionController(
+            {
+                'interactive': {'priority': 0, 'limit': 2},
+                'llm': {'priority': 1, 'limit': 2, 'queue': 2, 'queue_timeout': 1.0, 'target_latency': 8.0},
+            },
+            {'generate_ai_summary': 'llm'}, 'interactive', clock=FakeClock(),
+        )
+        llm = controller.classify('generate_ai_summary')
+        self.assertIs(controller.classify('analyze_query'), controller.classes['interactive'])
+
+        self.assertTrue(controller.acquire(llm))
+        self.assertTrue(controller.acquire(llm))
+        controller.classes['interactive'].waiting = 1
+        self.assertFalse(controller.acquire(llm))
+        self.assertEqual(llm.metrics['shed'], 1)
+
+        # Fast by its own target, but still cut while interactive is queueing
+        controller.release(llm, 0.5)
+        self.assertAlmostEqual(llm.limit, 1.8)
+        controller.classes['interactive'].waiting = 0
+        controller.release(llm, 0.5)
+        self.assertAlmostEqual(llm.limit, 1.8 + 1 / 1.8)
+
+    @override_settings(ADMISSION_CONTROL=True)
+    def test_middleware_sheds_with_retry_after(self):
+        controller = AdmissionController(
+            {'llm': {'priority': 0, 'limit': 1, 'max_limit': 1, 'target_latency': 4.0}},
+            {'generate_ai_summary': 'llm'}, None, clock=FakeClock(),
+        )
+        get_response = mock.Mock(return_value=HttpResponse(status=200))
+        middleware = AdmissionControlMiddleware(get_response)
+        middleware.controller = controller
+        request = RequestFactory().post('/api/generate-summary/')
+
+        self.assertEqual(middleware(request).status_code, 200)
+        self.assertEqual(controller.classes['llm'].in_flight, 0)
+
+        self.assertTrue(controller.acquire(controller.classes['llm']))
+        response = middleware(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '4')
+        self.assertEqual(json.loads(response.content)['class'], 'llm')
+        get_response.assert_called_once()
+
+        # Routes outside any class pass straight through
+        self.assertEqual(middleware(RequestFactory().get('/api/health/')).status_code, 200)
+
+
+class ForecastReferenceTests(SimpleTestCase):
+    """Batch fitters agree with straightforward per-area loops"""
+
+    def test_matches_per_area_loops(self):
+        cases = {
+            'contiguous': np.arange(2015, 2025),
+            'gap': np.array([2016, 2017, 2018, 2020, 2021, 2023, 2024]),
+        }
+        for label, years in cases.items():
+            flat = synthetic_series(150, years, missing=0.25, seed=1)['flat']
+            flat[:3] = np.nan
+            flat[3, 1:] = np.nan  # a single point: no trend to fit
+            for horizon in (1, 3):
+                for model, fitter, reference in (
+                    ('linear', fit_linear, reference_linear), ('holt', fit_holt, reference_holt),
+                ):
+                    with self.subTest(years=label, horizon=horizon, model=model):
+                        expected = np.array([reference(row, years, horizon) for row in flat])
+                        actual = fitter(flat, years, horizon)['point']
+                        self.assertTrue(np.isfinite(expected).sum() > 100)
+                        np.testing.assert_allclose(actual, expected, rtol=1e-9, equal_nan=True)
@@ -2,20 +2,37 @@
 URL Configuration for Chatbot API
 """
 
-from django.urls import path
+from django.urls import path, include
 from . import views
 
-urlpatterns = [
+dataset_patterns = [
     # Main endpoints
     path('analyze/', views.analyze_query, name='analyze_query'),
     path('areas/', views.get_available_areas, name='get_areas'),
+    path('areas/<str:name>/similar/', views.similar_areas, name='similar_areas'),
+    path('areas/<str:name>/forecast/', views.area_forecast, name='area_forecast'),
     
     # Additional features
     path('compare/', views.compare_areas, name='compare_areas'),
+    path('rankings/', views.market_rankings, name='market_rankings'),
+    path('forecast/', views.forecast_rankings, name='forecast_rankings'),
     path('download/', views.download_csv, name='download_csv'),
+    path('parse/', views.parse_query_endpoint, name='parse_query'),
+    path('upload/', views.upload_data, name='upload_data'),
 
     path('generate-summary/', views.generate_ai_summary_endpoint, name='generate_ai_summary'),
     
     # Health check
     path('health/', views.health_check, name='health_check'),
 ]
+
+urlpatterns = dataset_patterns + [
+    # Dataset registry
+    path('datasets/', views.list_datasets, name='list_datasets'),
+
+    # Admission control queue depths and rejection counts
+    path('admission/', views.admission_stats, name='admission_stats'),
+
+    # Same endpoints scoped to a dataset, e.g. /api/pune/analyze/
+    path('<slug:dataset>/', include((dataset_patterns, 'dataset'))),
+]
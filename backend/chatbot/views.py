@@ -3,95 +3,121 @@ API Views for Real Estate Chatbot
 Enhanced with rich, interactive response data
 """
 
-from rest_framework.decorators import api_view, parser_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, JSONParser
 from django.http import HttpResponse
 from django.conf import settings
 
-import pandas as pd
-import numpy as np
 import os
 import re
 import csv
 from datetime import datetime
 
+# pandas/NumPy-backed modules are imported where used, so URL resolution,
+# health checks and manage.py commands don't pay for them at boot
+from .datasets import registry, UnknownDataset, append_overlay
+from .admission import controller as admission
 from .groq_helper import generate_ai_summary, generate_comparison_summary
 
-# ========================
-# Configuration
-# ========================
-EXCEL_FILE_PATH = os.path.join(settings.BASE_DIR, 'data', 'realestate_data.xlsx')
-
 # ========================
 # Helper Functions
 # ========================
 
-def load_excel_data():
-    """Load Excel dataset and return DataFrame"""
+def get_dataset(request, dataset=None):
+    """
+    Resolve the dataset for a request from the URL prefix, the `dataset`
+    query/body parameter, or the configured default.
+
+    Returns:
+        (Dataset, None) on success, (None, Response) on failure
+    """
+    dataset_id = dataset or request.query_params.get('dataset')
+    if not dataset_id and isinstance(request.data, dict):
+        dataset_id = request.data.get('dataset')
+    dataset_id = dataset_id or settings.DEFAULT_DATASET
+
     try:
-        if not os.path.exists(EXCEL_FILE_PATH):
-            print(f"❌ ERROR: Excel file not found at {EXCEL_FILE_PATH}")
-            return None
-        
-        df = pd.read_excel(EXCEL_FILE_PATH)
-        df.columns = df.columns.str.strip()
-        
-        column_mapping = {
-            'final location': 'area',
-            'total_sales - igr': 'total_sales',
-            'total sold - igr': 'total_sold',
-            'flat - weighted average rate': 'flat_avg_rate',
-            'office - weighted average rate': 'office_avg_rate',
-            'shop - weighted average rate': 'shop_avg_rate',
-            'total carpet area supplied (sqft)': 'total_carpet_area',
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df.rename(columns={old_name: new_name}, inplace=True)
-        
-        df = df.dropna(subset=['area', 'year'])
-        df['area'] = df['area'].astype(str).str.strip()
-        
-        numeric_cols = ['total_sales', 'total_sold', 'flat_avg_rate', 'office_avg_rate', 
-                       'shop_avg_rate', 'total_carpet_area']
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.replace(',', '').replace('', '0')
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
-        print(f"✅ Successfully loaded {len(df)} records from {df['area'].nunique()} areas")
-        return df
-        
-    except Exception as e:
-        print(f"❌ ERROR loading Excel: {str(e)}")
+        loaded = registry.get(dataset_id)
+    except UnknownDataset:
+        return None, Response(
+            {
+                'error': f'Unknown dataset: {dataset_id}',
+                'availableDatasets': list(registry.sources),
+            },
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if loaded is None:
+        return None, Response(
+            {'error': 'Failed to load dataset'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return loaded, None
+
+def parse_query(query, loaded):
+    """Parse a query against the dataset's areas and years"""
+    from .query_parser import get_query_parser
+    return get_query_parser(loaded).parse(query)
+
+def slice_area(loaded, area, parsed=None):
+    """Year-sorted rows for area, restricted to the parsed year range if any"""
+    from .query_parser import get_area_index
+    if parsed is None:
+        return get_area_index(loaded).slice(area)
+    return get_area_index(loaded).slice(area, parsed.start_year, parsed.end_year)
+
+def request_flag(request, name):
+    """True when a boolean query/body parameter is set"""
+    flag = request.query_params.get(name)
+    if flag is None and isinstance(request.data, dict):
+        flag = request.data.get(name)
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def is_debug(request):
+    """True when the client asked for parser debug output"""
+    return request_flag(request, 'debug')
+
+def describe_years(start_year, end_year):
+    """Year range as a phrase ("in 2019", "in 2019-2021", "since 2019", "up to 2019")"""
+    if start_year is not None and end_year is not None:
+        return f"in {start_year}" if start_year == end_year else f"in {start_year}-{end_year}"
+    return f"since {start_year}" if start_year is not None else f"up to {end_year}"
+
+def no_data_response(loaded, area, parsed):
+    """404 for an area with no rows, naming the year range if that was the cause"""
+    history = slice_area(loaded, area)
+    if history is None or history.empty or (parsed.start_year is None and parsed.end_year is None):
+        return Response(
+            {'error': f'No data found for {area}'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(
+        {
+            'error': f'No data for {area} {describe_years(parsed.start_year, parsed.end_year)}',
+            'availableYears': f"{int(history['year'].min())}-{int(history['year'].max())}",
+        },
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+def requested_metrics(request, parsed):
+    """
+    Metrics to narrow chart/table/CSV output to: the ones named in the
+    query, but only when the client opts in with `"metricsOnly": true`
+    (the bundled UI always reads rates, sales and units)
+    """
+    if not parsed.metrics or not request_flag(request, 'metricsOnly'):
         return None
+    return parsed.metrics
 
-def extract_area_from_query(query, df):
-    """Extract area name from user query"""
-    query_lower = query.lower()
-    available_areas = df['area'].unique()
-    
-    for area in available_areas:
-        if area.lower() in query_lower:
-            return area
-    return None
-
-def extract_multiple_areas(query, df):
-    """Extract multiple area names from query (for comparison)"""
-    query_lower = query.lower()
-    available_areas = df['area'].unique()
-    found_areas = []
-    
-    for area in available_areas:
-        if area.lower() in query_lower:
-            found_areas.append(area)
-    
-    return found_areas
+def select_fields(records, metrics, fields, always):
+    """Shrink records to the requested metric fields (all fields if none requested)"""
+    if not metrics:
+        return records
+    keep = set(always) | {fields[m] for m in metrics}
+    return [{k: v for k, v in record.items() if k in keep} for record in records]
 
 def generate_summary(df, area):
     """Generate natural language summary"""
@@ -142,8 +168,9 @@ def generate_summary(df, area):
 """
     return summary.strip()
 
-def prepare_chart_data(df):
-    """Convert DataFrame to chart-ready JSON"""
+def prepare_chart_data(df, metrics=None):
+    """Convert DataFrame to chart-ready JSON, limited to metrics if given"""
+    from .query_parser import CHART_FIELDS
     chart_data = []
     df = df.sort_values('year')
     
@@ -166,10 +193,11 @@ def prepare_chart_data(df):
         
         chart_data.append(data_point)
     
-    return chart_data
+    return select_fields(chart_data, metrics, CHART_FIELDS, ['year'])
 
-def prepare_table_data(df):
-    """Convert DataFrame to table format"""
+def prepare_table_data(df, metrics=None):
+    """Convert DataFrame to table format, limited to metrics if given"""
+    from .query_parser import TABLE_FIELDS
     df = df.sort_values('year', ascending=False)
     table_data = []
     
@@ -182,12 +210,57 @@ def prepare_table_data(df):
             'Flat Rate (₹/sqft)': f"{float(row['flat_avg_rate']):.2f}",
         }
         
+        if metrics and 'office' in metrics and 'office_avg_rate' in df.columns:
+            record['Office Rate (₹/sqft)'] = f"{float(row['office_avg_rate']):.2f}"
+        
+        if metrics and 'shop' in metrics and 'shop_avg_rate' in df.columns:
+            record['Shop Rate (₹/sqft)'] = f"{float(row['shop_avg_rate']):.2f}"
+        
         if 'total_carpet_area' in df.columns:
             record['Carpet Area (sqft)'] = f"{float(row['total_carpet_area']):,.0f}"
         
         table_data.append(record)
     
-    return table_data
+    return select_fields(table_data, metrics, TABLE_FIELDS, ['Year', 'Area'])
+
+def build_analyze_payload(dataset_id, area, df, query, metrics=None):
+    """Analyze response body for an area's year-sorted rows"""
+    return {
+        'area': area,
+        'dataset': dataset_id,
+        'summary': generate_summary(df, area),
+        'chartData': prepare_chart_data(df, metrics),
+        'tableData': prepare_table_data(df, metrics),
+        'query': query,
+        'recordCount': len(df),
+        'yearRange': f"{int(df['year'].min())}-{int(df['year'].max())}"
+    }
+
+def prerendered_analyze(request, loaded, parsed, query):
+    """
+    Pre-rendered analyze response, if this request can use one: the whole
+    history of one area, JSON output, no debug or forecast fields.
+    """
+    if not settings.ANALYZE_PRERENDER or is_debug(request) or request_flag(request, 'forecast'):
+        return None
+    if parsed.start_year is not None or parsed.end_year is not None or requested_metrics(request, parsed):
+        return None
+    if getattr(request, 'accepted_renderer', None) is None or request.accepted_renderer.format != 'json':
+        return None
+
+    from .payloads import get_payload_store
+    body = get_payload_store(loaded).render(parsed.area, query)
+    if body is None:
+        return None
+    return HttpResponse(body, content_type='application/json')
+
+def prerender_on_load(loaded):
+    """Registry load hook: build the analyze payload store eagerly"""
+    from .payloads import get_payload_store
+    get_payload_store(loaded)
+
+if settings.ANALYZE_PRERENDER:
+    registry.on_load(prerender_on_load)
 
 # ========================
 # API ENDPOINTS
@@ -195,8 +268,8 @@ def prepare_table_data(df):
 
 @api_view(['POST'])
 @parser_classes([JSONParser])
-def analyze_query(request):
-    """Main analysis endpoint"""
+def analyze_query(request, dataset=None):
+    """Main analysis endpoint (`"forecast": true` adds next-year projections)"""
     try:
         query = request.data.get('query', '').strip()
         
@@ -206,14 +279,13 @@ def analyze_query(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        df = load_excel_data()
-        if df is None:
-            return Response(
-                {'error': 'Failed to load dataset'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        df = loaded.df
         
-        area = extract_area_from_query(query, df)
+        parsed = parse_query(query, loaded)
+        area = parsed.area
         
         if not area:
             available_areas = df['area'].unique().tolist()
@@ -226,29 +298,30 @@ def analyze_query(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        filtered_df = df[df['area'].str.lower() == area.lower()].copy()
+        prerendered = prerendered_analyze(request, loaded, parsed, query)
+        if prerendered is not None:
+            return prerendered
         
-        if filtered_df.empty:
-            return Response(
-                {'error': f'No data found for {area}'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        filtered_df = slice_area(loaded, area, parsed)
         
-        filtered_df = filtered_df.sort_values('year')
+        if filtered_df is None or filtered_df.empty:
+            return no_data_response(loaded, area, parsed)
         
-        summary = generate_summary(filtered_df, area)
-        chart_data = prepare_chart_data(filtered_df)
-        table_data = prepare_table_data(filtered_df)
+        response_data = build_analyze_payload(
+            loaded.id, area, filtered_df, query, requested_metrics(request, parsed)
+        )
         
-        response_data = {
-            'area': area,
-            'summary': summary,
-            'chartData': chart_data,
-            'tableData': table_data,
-            'query': query,
-            'recordCount': len(filtered_df),
-            'yearRange': f"{int(filtered_df['year'].min())}-{int(filtered_df['year'].max())}"
-        }
+        if request_flag(request, 'forecast'):
+            from .forecasting import get_forecaster
+            forecaster = get_forecaster(loaded)
+            row = forecaster.find(area)
+            response_data['forecast'] = {
+                'year': forecaster.target_year(),
+                'series': forecaster.for_area(row) if row is not None else None,
+            }
+        
+        if is_debug(request):
+            response_data['parsedQuery'] = parsed.to_dict()
         
         return Response(response_data, status=status.HTTP_200_OK)
         
@@ -260,15 +333,13 @@ def analyze_query(request):
         )
 
 @api_view(['GET'])
-def get_available_areas(request):
+def get_available_areas(request, dataset=None):
     """Get list of all available areas"""
     try:
-        df = load_excel_data()
-        if df is None:
-            return Response(
-                {'error': 'Failed to load dataset'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        df = loaded.df
         
         areas = sorted(df['area'].unique().tolist())
         
@@ -283,6 +354,7 @@ def get_available_areas(request):
             })
         
         return Response({
+            'dataset': loaded.id,
             'areas': areas,
             'count': len(areas),
             'details': area_stats
@@ -296,19 +368,17 @@ def get_available_areas(request):
         )
 
 @api_view(['POST'])
-def compare_areas(request):
+def compare_areas(request, dataset=None):
     """Compare multiple areas"""
     try:
         query = request.data.get('query', '')
         
-        df = load_excel_data()
-        if df is None:
-            return Response(
-                {'error': 'Failed to load dataset'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
         
-        areas = extract_multiple_areas(query, df)
+        parsed = parse_query(query, loaded)
+        areas = parsed.areas
         
         if len(areas) < 2:
             return Response(
@@ -317,24 +387,31 @@ def compare_areas(request):
             )
         
         comparison_data = []
+        metrics = requested_metrics(request, parsed)
         
         for area in areas:
-            area_df = df[df['area'] == area].copy()
+            area_df = slice_area(loaded, area, parsed)
             
-            if not area_df.empty:
+            if area_df is not None and not area_df.empty:
                 comparison_data.append({
                     'area': area,
                     'avgFlatRate': float(area_df['flat_avg_rate'].mean()),
                     'totalSales': float(area_df['total_sales'].sum()) / 10000000,
                     'totalUnitsSold': int(area_df['total_sold'].sum()),
-                    'chartData': prepare_chart_data(area_df)
+                    'chartData': prepare_chart_data(area_df, metrics)
                 })
         
-        return Response({
+        response_data = {
+            'dataset': loaded.id,
             'areas': areas,
             'comparison': comparison_data,
             'query': query
-        }, status=status.HTTP_200_OK)
+        }
+        
+        if is_debug(request):
+            response_data['parsedQuery'] = parsed.to_dict()
+        
+        return Response(response_data, status=status.HTTP_200_OK)
         
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")
@@ -344,19 +421,19 @@ def compare_areas(request):
         )
 
 @api_view(['POST'])
-def download_csv(request):
+def download_csv(request, dataset=None):
     """Download filtered data as CSV"""
+    from .analytics import SERIES_COLUMNS
+    
     try:
         query = request.data.get('query', '')
         
-        df = load_excel_data()
-        if df is None:
-            return Response(
-                {'error': 'Failed to load dataset'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
         
-        area = extract_area_from_query(query, df)
+        parsed = parse_query(query, loaded)
+        area = parsed.area
         
         if not area:
             return Response(
@@ -364,18 +441,20 @@ def download_csv(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        filtered_df = df[df['area'].str.lower() == area.lower()].copy()
+        filtered_df = slice_area(loaded, area, parsed)
         
-        if filtered_df.empty:
-            return Response(
-                {'error': f'No data found for {area}'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        if filtered_df is None or filtered_df.empty:
+            return no_data_response(loaded, area, parsed)
         
         response = HttpResponse(content_type='text/csv')
-        filename = f"{area.replace(' ', '_')}_RealEstate_Data_{datetime.now().strftime('%Y%m%d')}.csv"
+        filename = f"{loaded.id}_{area.replace(' ', '_')}_RealEstate_Data_{datetime.now().strftime('%Y%m%d')}.csv"
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
+        metrics = requested_metrics(request, parsed)
+        if metrics:
+            columns = ['area', 'year'] + [SERIES_COLUMNS[m] for m in metrics]
+            filtered_df = filtered_df[[c for c in columns if c in filtered_df.columns]]
+        
         filtered_df.to_csv(response, index=False)
         
         return response
@@ -488,13 +567,14 @@ def download_csv(request):
     
 @api_view(['POST'])
 @parser_classes([JSONParser])
-def generate_ai_summary_endpoint(request):
+def generate_ai_summary_endpoint(request, dataset=None):
     """
     Generate AI summary on-demand for existing data
     
     POST /api/generate-summary/
     Body: {
         "area": "Wakad",
+        "dataset": "pune",  // Optional, defaults to DEFAULT_DATASET
         "data": {...}  // The analysis data
     }
     """
@@ -508,6 +588,16 @@ def generate_ai_summary_endpoint(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        dataset_id = dataset or request.data.get('dataset') or settings.DEFAULT_DATASET
+        if dataset_id not in registry.sources:
+            return Response(
+                {
+                    'error': f'Unknown dataset: {dataset_id}',
+                    'availableDatasets': list(registry.sources),
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
         # Prepare data for AI
         ai_data = {
             'area': area,
@@ -525,6 +615,7 @@ def generate_ai_summary_endpoint(request):
         return Response({
             'aiSummary': ai_summary,
             'area': area,
+            'dataset': dataset_id,
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }, status=status.HTTP_200_OK)
         
@@ -537,16 +628,378 @@ def generate_ai_summary_endpoint(request):
 
 
 @api_view(['GET'])
-def health_check(request):
-    """Health check endpoint"""
-    df = load_excel_data()
+def market_rankings(request, dataset=None):
+    """
+    Rank all areas by a growth/trend/volatility metric
+    
+    GET /api/rankings/?metric=flat_cagr&k=10&start=2020&end=2024&order=desc
+    """
+    from .analytics import get_market_analytics, METRICS
+    
+    try:
+        metric = request.query_params.get('metric', 'flat_cagr')
+        if metric not in METRICS:
+            return Response(
+                {'error': f'Unknown metric: {metric}', 'availableMetrics': METRICS},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            k = int(request.query_params.get('k', 10))
+            start = request.query_params.get('start')
+            end = request.query_params.get('end')
+            start = int(start) if start else None
+            end = int(end) if end else None
+        except ValueError:
+            return Response(
+                {'error': 'k, start and end must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ascending = request.query_params.get('order', 'desc').lower() == 'asc'
+        
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        
+        analytics = get_market_analytics(loaded)
+        years = analytics.years[analytics.year_slice(start, end)]
+        
+        return Response({
+            'dataset': loaded.id,
+            'metric': metric,
+            'description': METRICS[metric],
+            'order': 'asc' if ascending else 'desc',
+            'yearRange': f"{int(years[0])}-{int(years[-1])}" if len(years) else 'N/A',
+            'rankings': analytics.rank(metric, k=max(k, 0), start=start, end=end, ascending=ascending),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        return Response(
+            {'error': f'Server error: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def similar_areas(request, name, dataset=None):
+    """
+    Recommend comparable areas by price level, growth and demand profile
+    
+    GET /api/areas/<name>/similar/?k=5
+    """
+    from .similarity import get_similarity_index, FEATURES
+    
+    try:
+        try:
+            k = int(request.query_params.get('k', 5))
+        except ValueError:
+            return Response(
+                {'error': 'k must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        
+        index = get_similarity_index(loaded)
+        row = index.find(name)
+        if row is None:
+            return Response(
+                {'error': f'No data found for {name}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({
+            'dataset': loaded.id,
+            'area': str(index.areas[row]),
+            'features': FEATURES,
+            'similar': index.similar(row, k=k),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        return Response(
+            {'error': f'Server error: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def parse_forecast_params(request):
+    """
+    horizon/series/model query parameters for the forecast endpoints
+
+    Returns:
+        ((horizon, series list, model list), None) or (None, Response)
+    """
+    from .forecasting import FORECAST_SERIES, MAX_HORIZON, MODELS
+    
+    try:
+        horizon = int(request.query_params.get('horizon', 1))
+    except ValueError:
+        horizon = 0
+    if not 1 <= horizon <= MAX_HORIZON:
+        return None, Response(
+            {'error': f'horizon must be an integer from 1 to {MAX_HORIZON}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    series = [s for s in request.query_params.get('series', '').split(',') if s]
+    models = [m for m in request.query_params.get('model', '').split(',') if m]
+    unknown = [s for s in series if s not in FORECAST_SERIES] + [m for m in models if m not in MODELS]
+    if unknown:
+        return None, Response(
+            {
+                'error': f"Unknown series/model: {', '.join(unknown)}",
+                'availableSeries': FORECAST_SERIES,
+                'availableModels': MODELS,
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return (horizon, series, models), None
+
+
+@api_view(['GET'])
+def area_forecast(request, name, dataset=None):
+    """
+    Projected rates and volumes with 95% intervals for one area
+    
+    GET /api/areas/<name>/forecast/?horizon=1&series=flat,units&model=holt
+    """
+    from .forecasting import get_forecaster, MODELS
+    
+    try:
+        params, error = parse_forecast_params(request)
+        if error:
+            return error
+        horizon, series, models = params
+        
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        
+        forecaster = get_forecaster(loaded)
+        row = forecaster.find(name)
+        if row is None:
+            return Response(
+                {'error': f'No data found for {name}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({
+            'dataset': loaded.id,
+            'area': str(forecaster.areas[row]),
+            'year': forecaster.target_year(horizon),
+            'models': MODELS,
+            'forecast': forecaster.for_area(row, horizon, series, models),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        return Response(
+            {'error': f'Server error: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def forecast_rankings(request, dataset=None):
+    """
+    Areas ranked by projected % change in one series
+    
+    GET /api/forecast/?series=flat&model=holt&horizon=1&k=10&order=desc
+    """
+    from .forecasting import get_forecaster, MODELS
+    
+    try:
+        params, error = parse_forecast_params(request)
+        if error:
+            return error
+        horizon, series, models = params
+        series = series[0] if series else 'flat'
+        model = models[0] if models else 'holt'
+        
+        try:
+            k = int(request.query_params.get('k', 10))
+        except ValueError:
+            return Response(
+                {'error': 'k must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ascending = request.query_params.get('order', 'desc').lower() == 'asc'
+        
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        
+        forecaster = get_forecaster(loaded)
+        
+        return Response({
+            'dataset': loaded.id,
+            'series': series,
+            'model': model,
+            'description': MODELS[model],
+            'year': forecaster.target_year(horizon),
+            'order': 'asc' if ascending else 'desc',
+            'rankings': forecaster.rank(series, model, horizon, k=max(k, 0), ascending=ascending),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        return Response(
+            {'error': f'Server error: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@parser_classes([JSONParser])
+def parse_query_endpoint(request, dataset=None):
+    """
+    Show how a query is parsed (areas, year range, metrics, intent)
+    
+    POST /api/parse/
+    Body: {"query": "Wakad flat prices 2020-2023"}
+    """
+    try:
+        query = request.data.get('query', '').strip()
+        
+        if not query:
+            return Response(
+                {'error': 'Query is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        loaded, error = get_dataset(request, dataset)
+        if error:
+            return error
+        
+        return Response({
+            'dataset': loaded.id,
+            'query': query,
+            'parsedQuery': parse_query(query, loaded).to_dict(),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        return Response(
+            {'error': f'Server error: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+@permission_classes([IsAdminUser])
+def upload_data(request, dataset=None):
+    """
+    Merge a new xlsx/CSV of area-year rows into the live dataset (staff only)
+    
+    POST /api/upload/  (multipart, field "file", optional "dataset")
+    Rows replace existing (area, year) records; only affected areas'
+    indexes and aggregates are recomputed.
+    """
+    from .ingest import read_upload, UploadError
+    
+    try:
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response(
+                {'error': 'File is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dataset_id = dataset or request.data.get('dataset') or settings.DEFAULT_DATASET
+        if dataset_id not in registry.sources:
+            return Response(
+                {
+                    'error': f'Unknown dataset: {dataset_id}',
+                    'availableDatasets': list(registry.sources),
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            rows = read_upload(uploaded)
+        except UploadError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        previous = registry.get(dataset_id)
+        known_areas = set(previous.df['area'].unique()) if previous is not None else set()
+        
+        append_overlay(registry.sources[dataset_id], rows)
+        loaded, error = get_dataset(request, dataset_id)
+        if error:
+            return error
+        
+        affected = sorted(rows['area'].unique().tolist())
+        return Response({
+            'dataset': loaded.id,
+            'generation': loaded.generation,
+            'rowsReceived': len(rows),
+            'areasAffected': affected,
+            'newAreas': [area for area in affected if area not in known_areas],
+            'totalRecords': len(loaded.df),
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        return Response(
+            {'error': f'Server error: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def health_check(request, dataset=None):
+    """
+    Health check endpoint
+    
+    Reports on the dataset only if it is already loaded, so probes never
+    trigger a workbook load (or import pandas) on a fresh worker.
+    """
+    dataset_id = dataset or request.query_params.get('dataset') or settings.DEFAULT_DATASET
+    loaded = registry.peek(dataset_id)
+    df = loaded.df if loaded is not None else None
     
     return Response({
         'status': 'healthy',
         'message': 'Real Estate Chatbot API is running successfully! 🚀',
+        'dataset': dataset_id,
+        'datasetConfigured': dataset_id in registry.sources and os.path.exists(registry.sources[dataset_id]),
         'datasetLoaded': df is not None,
         'totalRecords': len(df) if df is not None else 0,
         'areas': df['area'].unique().tolist() if df is not None else [],
         'yearRange': f"{int(df['year'].min())}-{int(df['year'].max())}" if df is not None else 'N/A',
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def list_datasets(request):
+    """
+    List configured datasets with per-dataset load/evict metrics
+    
+    GET /api/datasets/
+    """
+    stats = registry.stats()
+    for entry in stats['datasets']:
+        loaded = registry.peek(entry['id'])
+        store = loaded.cached('analyze_payloads') if loaded is not None else None
+        entry['analyzePayloads'] = store.stats() if store is not None else None
+    return Response(stats, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def admission_stats(request):
+    """
+    Admission control state per priority class (limit, in-flight, queue
+    depth, admitted/rejected/shed counts) for this worker process
+    
+    GET /api/admission/
+    """
+    return Response(admission.stats(), status=status.HTTP_200_OK)
@@ -43,7 +43,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this for static files
+    'chatbot.middleware.CompressionMiddleware',  # brotli/gzip for /api/ JSON responses
     'corsheaders.middleware.CorsMiddleware',
+    'chatbot.middleware.AdmissionControlMiddleware',  # per-class adaptive concurrency limits
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -103,6 +105,32 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Datasets - "id=path" pairs, paths relative to BASE_DIR
+# e.g. DATASETS=pune=data/realestate_data.xlsx,mumbai=data/mumbai_2024.xlsx
+DATASETS = {
+    dataset_id.strip(): BASE_DIR / path.strip()
+    for dataset_id, path in (
+        entry.split('=', 1)
+        for entry in os.environ.get('DATASETS', 'pune=data/realestate_data.xlsx').split(',')
+        if '=' in entry
+    )
+}
+DEFAULT_DATASET = os.environ.get('DEFAULT_DATASET', next(iter(DATASETS)))
+DATASET_MEMORY_BUDGET_MB = int(os.environ.get('DATASET_MEMORY_BUDGET_MB', '256'))
+
+# Uploads - rows are parsed UPLOAD_CHUNK_ROWS at a time
+UPLOAD_CHUNK_ROWS = int(os.environ.get('UPLOAD_CHUNK_ROWS', '5000'))
+UPLOAD_MAX_ROWS = int(os.environ.get('UPLOAD_MAX_ROWS', '200000'))
+
+# Pre-rendered analyze payloads - built for every area when a dataset loads
+# (chatbot/payloads.py). ANALYZE_PRERENDER_DIR memory-maps them from disk so
+# workers share one copy; empty keeps them in process memory
+ANALYZE_PRERENDER = os.environ.get('ANALYZE_PRERENDER', 'False') == 'True'
+ANALYZE_PRERENDER_WORKERS = int(os.environ.get('ANALYZE_PRERENDER_WORKERS', '0'))  # 0 = one per CPU
+ANALYZE_PRERENDER_DIR = os.environ.get('ANALYZE_PRERENDER_DIR', '')
+if ANALYZE_PRERENDER_DIR:
+    ANALYZE_PRERENDER_DIR = str(BASE_DIR / ANALYZE_PRERENDER_DIR)
+
 # Default primary key
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -121,12 +149,47 @@ CORS_ALLOW_HEADERS = [
     'dnt', 'origin', 'user-agent', 'x-csrftoken', 'x-requested-with',
 ]
 
-# REST Framework
+# Response compression - bodies smaller than this go out as-is
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# Admission control - adaptive per-class concurrency limits (see chatbot/admission.py)
+# Lower priority number wins; classes queue up to `queue` requests for
+# `queue_timeout` seconds, then shed with 503 + Retry-After
+ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'True') == 'True'
+ADMISSION_CLASSES = {
+    'interactive': {
+        'priority': 0, 'limit': 16, 'min_limit': 4, 'max_limit': 64,
+        'queue': 64, 'queue_timeout': 2.0, 'target_latency': 0.5,
+    },
+    'bulk': {
+        'priority': 1, 'limit': 2, 'min_limit': 1, 'max_limit': 4,
+        'queue': 4, 'queue_timeout': 5.0, 'target_latency': 10.0,
+    },
+    # In flight + queued LLM calls each hold a worker thread: cap them at half
+    # of the --threads 12 the README recommends, whatever the latency
+    'llm': {
+        'priority': 2, 'limit': int(os.environ.get('ADMISSION_LLM_LIMIT', '4')), 'min_limit': 1, 'max_limit': 4,
+        'queue': 2, 'queue_timeout': 1.0, 'target_latency': 8.0,
+    },
+}
+# Route name -> class; None exempts the route, unlisted routes are ADMISSION_DEFAULT_CLASS
+ADMISSION_ROUTES = {
+    'generate_ai_summary': 'llm',
+    'upload_data': 'bulk',
+    'download_csv': 'bulk',
+    'health_check': None,
+    'list_datasets': None,
+    'admission_stats': None,
+}
+ADMISSION_DEFAULT_CLASS = 'interactive'
+
+# REST Framework - browsable API only while debugging
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+        'chatbot.renderers.FastJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.MultiPartParser',